@@ -0,0 +1,55 @@
+"""
+Compares two results of the benchmark suite.
+
+Exits with a non-zero status when a benchmark of the new results is slower, or
+uses more memory, than in the reference results by more than the threshold.
+
+    python benchmarks/compare.py reference.json new.json --threshold 0.1
+"""
+from __future__ import print_function
+import argparse
+import json
+import sys
+
+
+MEASURES = ('min_seconds', 'peak_memory_bytes')
+
+
+def compare(reference, new, threshold):
+    """
+    :returns: List of the (name, measure, reference value, new value) regressions.
+    """
+    reference_results = dict((result['name'], result) for result in reference['results'])
+    regressions = []
+
+    for result in new['results']:
+        reference_result = reference_results.get(result['name'])
+        if reference_result is None:
+            continue
+
+        for measure in MEASURES:
+            # The startup benchmark does not measure the memory.
+            if measure not in result or measure not in reference_result:
+                continue
+            if result[measure] > reference_result[measure] * (1 + threshold):
+                regressions.append((result['name'], measure, reference_result[measure], result[measure]))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('reference', type=argparse.FileType('r'))
+    parser.add_argument('new', type=argparse.FileType('r'))
+    parser.add_argument('--threshold', type=float, default=0.1, help='Tolerated relative increase.')
+    arguments = parser.parse_args()
+
+    regressions = compare(json.load(arguments.reference), json.load(arguments.new), arguments.threshold)
+    for name, measure, reference_value, new_value in regressions:
+        print('%s : %s went from %g to %g.' % (name, measure, reference_value, new_value))
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark of the startup time of the confirm command line interface.
+
+Every command is run in a new interpreter, as in a pre-commit hook, and its
+wall time is measured. The time spent importing `confirm.main` is measured
+with ``python -X importtime``. The results have the format of the benchmark
+suite, so that they can be compared with `compare.py`.
+
+    PYTHONPATH=. python benchmarks/startup.py --output startup.json --max-import-milliseconds 100
+"""
+from __future__ import print_function
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+SCHEMA = """
+section:
+  option:
+    required: true
+    type: int
+"""
+
+CONFIG = """
+[section]
+option = 1
+"""
+
+
+def get_commands(directory):
+    """
+    Returns the commands to measure as (name, arguments) tuples.
+    """
+    schema_path = os.path.join(directory, 'schema.yaml')
+    config_path = os.path.join(directory, 'config.ini')
+    with open(schema_path, 'w') as schema_file:
+        schema_file.write(SCHEMA)
+    with open(config_path, 'w') as config_file:
+        config_file.write(CONFIG)
+
+    return [
+        ('help', ['--help']),
+        ('validate', ['validate', schema_path, config_path]),
+        ('document', ['document', schema_path]),
+        ('init', ['init', config_path]),
+    ]
+
+
+def _run(arguments):
+    with open(os.devnull, 'w') as devnull:
+        subprocess.check_call(arguments, stdout=devnull, stderr=devnull)
+
+
+def measure_command(arguments, repeat):
+    command = [sys.executable, '-c', 'import sys; from confirm.main import cli; cli(sys.argv[1:])'] + arguments
+
+    durations = []
+    for _ in range(repeat):
+        start = time.time()
+        _run(command)
+        durations.append(time.time() - start)
+
+    durations.sort()
+    return {
+        'min_seconds': durations[0],
+        'median_seconds': durations[len(durations) // 2],
+    }
+
+
+def measure_import(module_name, repeat):
+    """
+    :returns: Minimal cumulative import time of the module, in seconds.
+    """
+    import_times = []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-X', 'importtime', '-c', 'import ' + module_name], stderr=subprocess.STDOUT
+        ).decode('utf-8')
+
+        # The line of the imported module is the last one, with its cumulative time in microseconds.
+        import_lines = [line for line in output.splitlines() if line.startswith('import time:')]
+        import_times.append(int(import_lines[-1].split('|')[1]) / 1e6)
+
+    return min(import_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--max-import-milliseconds', type=float, default=None,
+                        help='Exits with a non-zero status when importing confirm.main takes longer.')
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout)
+    arguments = parser.parse_args()
+
+    import_seconds = measure_import('confirm.main', arguments.repeat)
+    results = [{'name': 'import_main', 'min_seconds': import_seconds}]
+    print('%-24s %8.1fms' % ('import_main', import_seconds * 1000), file=sys.stderr)
+
+    directory = tempfile.mkdtemp()
+    try:
+        for name, command_arguments in get_commands(directory):
+            result = measure_command(command_arguments, arguments.repeat)
+            result['name'] = 'command_' + name
+            results.append(result)
+            print('%-24s %8.1fms' % (result['name'], result['min_seconds'] * 1000), file=sys.stderr)
+    finally:
+        shutil.rmtree(directory)
+
+    json.dump({
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'parameters': {'repeat': arguments.repeat},
+        'results': results,
+    }, arguments.output, indent=2, sort_keys=True)
+    arguments.output.write('\n')
+
+    if arguments.max_import_milliseconds is not None and import_seconds * 1000 > arguments.max_import_milliseconds:
+        print('Importing confirm.main took %.1fms, more than the budget of %.1fms.' % (
+            import_seconds * 1000, arguments.max_import_milliseconds
+        ), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark suite of the main confirm operations on synthetic schemas.
+
+Every benchmark is timed, then run once more with tracemalloc to measure its
+peak memory. The results are written as JSON so that they can be compared
+between releases.
+
+    PYTHONPATH=. python benchmarks/suite.py --sections 10000 --options 100 --output results.json
+"""
+from __future__ import print_function
+import argparse
+import copy
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from confirm import generator
+from confirm.schema import CompiledSchema
+from confirm.validator import Validation
+
+from synthetic import config_to_ini, generate_config, generate_schema
+
+
+class _NullStream(object):
+
+    def write(self, text):
+        pass
+
+
+def _merged_config(schema, config):
+    return generator.append_existing_values(copy.deepcopy(schema), config)
+
+
+def get_benchmarks(schema, config):
+    """
+    Returns the benchmarks as (name, setup, function) tuples.
+
+    The setup result is passed to the function, and is not part of the measures.
+    """
+    compiled_schema = CompiledSchema(schema)
+    ini_config = config_to_ini(config)
+
+    def validate(validation):
+        validation.validate()
+
+    return [
+        ('compile_schema', lambda: schema, CompiledSchema),
+        ('compile_flat_schema', lambda: schema, lambda schema: CompiledSchema(schema, is_flat=True)),
+        ('validate', lambda: Validation(config, compiled_schema), validate),
+        ('validate_uncompiled', lambda: schema, lambda schema: Validation(config, schema).validate()),
+        ('append_existing_values', lambda: copy.deepcopy(schema), lambda schema: generator.append_existing_values(schema, config)),
+        ('generate_config_parser', lambda: _merged_config(schema, config), generator.generate_config_parser),
+        ('write_config', lambda: _merged_config(schema, config), lambda config: generator.write_config(config, _NullStream())),
+        ('generate_documentation', lambda: schema, generator.generate_documentation),
+        ('generate_schema_file', lambda: ini_config, generator.generate_schema_file),
+    ]
+
+
+def measure(setup, function, repeat):
+    durations = []
+    for _ in range(repeat):
+        argument = setup()
+        gc.collect()
+        start = time.perf_counter()
+        function(argument)
+        durations.append(time.perf_counter() - start)
+
+    argument = setup()
+    gc.collect()
+    tracemalloc.start()
+    function(argument)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    durations.sort()
+    return {
+        'min_seconds': durations[0],
+        'median_seconds': durations[len(durations) // 2],
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--sections', type=int, default=1000)
+    parser.add_argument('--options', type=int, default=20, help='Number of options per section.')
+    parser.add_argument('--required-ratio', type=float, default=0.1)
+    parser.add_argument('--deprecated-ratio', type=float, default=0.05)
+    parser.add_argument('--typo-ratio', type=float, default=0.01)
+    parser.add_argument('--missing-ratio', type=float, default=0.05)
+    parser.add_argument('--invalid-ratio', type=float, default=0.01)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', action='append', help='Only run the benchmarks with this name.')
+    parser.add_argument('--max-uncompiled-ratio', type=float, default=None,
+                        help='Exits with a non-zero status when validate_uncompiled takes more than this many times validate.')
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout)
+    arguments = parser.parse_args()
+
+    schema = generate_schema(arguments.sections, arguments.options, arguments.required_ratio, arguments.deprecated_ratio)
+    config = generate_config(schema, arguments.typo_ratio, arguments.missing_ratio, arguments.invalid_ratio)
+
+    results = []
+    for name, setup, function in get_benchmarks(schema, config):
+        if arguments.only and name not in arguments.only:
+            continue
+
+        result = measure(setup, function, arguments.repeat)
+        result['name'] = name
+        results.append(result)
+        print('%-24s %8.3fs %10.1f MiB' % (name, result['min_seconds'], result['peak_memory_bytes'] / 2.0 ** 20), file=sys.stderr)
+
+    parameters = dict(vars(arguments))
+    del parameters['output']
+
+    json.dump({
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'parameters': parameters,
+        'results': results,
+    }, arguments.output, indent=2, sort_keys=True)
+    arguments.output.write('\n')
+
+    # Validating against a schema dictionary compiles it first, which must stay cheap.
+    seconds = dict((result['name'], result['min_seconds']) for result in results)
+    if arguments.max_uncompiled_ratio is not None and 'validate' in seconds and 'validate_uncompiled' in seconds:
+        ratio = seconds['validate_uncompiled'] / seconds['validate']
+        if ratio > arguments.max_uncompiled_ratio:
+            print('validate_uncompiled took %.1f times validate, more than the budget of %.1f.' % (
+                ratio, arguments.max_uncompiled_ratio
+            ), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
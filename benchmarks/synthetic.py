@@ -0,0 +1,95 @@
+"""
+Generation of synthetic schemas and configurations for the benchmarks.
+"""
+import random
+
+
+def generate_schema(sections_count, options_count, required_ratio=0.1, deprecated_ratio=0.05, seed=0):
+    """
+    Generates a schema of `sections_count` sections of `options_count` options.
+
+    :param required_ratio: Fraction of the options which are required.
+    :param deprecated_ratio: Fraction of the options which are deprecated.
+    """
+    random_generator = random.Random(seed)
+    types = ['int', 'float', 'bool', 'str', 'list', None]
+    schema = {}
+
+    for section_index in range(sections_count):
+        section = schema.setdefault('section_%d' % section_index, {})
+
+        for option_index in range(options_count):
+            option = {'description': 'Description of option %d.' % option_index}
+
+            option_type = random_generator.choice(types)
+            if option_type:
+                option['type'] = option_type
+            if random_generator.random() < required_ratio:
+                option['required'] = True
+            if random_generator.random() < deprecated_ratio:
+                option['deprecated'] = True
+            if random_generator.random() < 0.5:
+                option['default'] = _generate_value(option_type, random_generator)
+
+            section['option_%d' % option_index] = option
+
+    return schema
+
+
+def _generate_value(option_type, random_generator):
+    if option_type == 'int':
+        return str(random_generator.randint(0, 10000))
+    if option_type == 'float':
+        return str(random_generator.random())
+    if option_type == 'bool':
+        return random_generator.choice(['true', 'false'])
+    return 'value_%d' % random_generator.randint(0, 10000)
+
+
+def _misspell(name, random_generator):
+    index = random_generator.randint(0, len(name) - 1)
+    return name[:index] + name[index + 1:] + random_generator.choice('abcdef')
+
+
+def generate_config(schema, typo_ratio=0.01, missing_ratio=0.05, invalid_ratio=0.01, seed=0):
+    """
+    Generates a configuration from a schema.
+
+    :param typo_ratio: Fraction of the sections and options whose name is misspelled.
+    :param missing_ratio: Fraction of the options which are left out.
+    :param invalid_ratio: Fraction of the values which do not match their type.
+    """
+    random_generator = random.Random(seed)
+    config = {}
+
+    for section_name, section in schema.items():
+        if random_generator.random() < typo_ratio:
+            section_name = _misspell(section_name, random_generator)
+        config_section = config.setdefault(section_name, {})
+
+        for option_name, option in section.items():
+            if random_generator.random() < missing_ratio:
+                continue
+            if random_generator.random() < typo_ratio:
+                option_name = _misspell(option_name, random_generator)
+
+            if random_generator.random() < invalid_ratio:
+                value = 'invalid value'
+            else:
+                value = _generate_value(option.get('type'), random_generator)
+            config_section[option_name] = value
+
+    return config
+
+
+def config_to_ini(config):
+    """
+    Returns the .INI representation of a configuration.
+    """
+    lines = []
+    for section_name, section in config.items():
+        lines.append('[%s]' % section_name)
+        for option_name, value in section.items():
+            lines.append('%s = %s' % (option_name, value))
+        lines.append('')
+    return '\n'.join(lines)
@@ -0,0 +1,50 @@
+"""
+Benchmark of the typo detection on large sets of orphan names.
+
+Compares `TypoIndex` against one `difflib.get_close_matches` call per missing
+name, which is how typos used to be detected.
+
+    python benchmarks/typo.py [ORPHANS_COUNT] [MISSING_COUNT]
+"""
+from __future__ import print_function
+from difflib import get_close_matches
+import random
+import sys
+import timeit
+
+from confirm.utils import DEFAULT_TYPO_RATIO, TypoIndex
+
+
+def generate_names(count, random_generator):
+    words = ['http', 'server', 'port', 'listen', 'pool', 'size', 'max', 'min', 'timeout', 'log', 'level', 'path']
+    return [
+        '_'.join(random_generator.choice(words) for _ in range(3)) + str(index)
+        for index in range(count)
+    ]
+
+
+def main(orphans_count=1000, missing_count=200):
+    random_generator = random.Random(0)
+    orphan_names = set(generate_names(orphans_count, random_generator))
+    missing_names = generate_names(missing_count, random_generator)
+
+    def with_difflib():
+        return [get_close_matches(name, orphan_names, n=1, cutoff=DEFAULT_TYPO_RATIO) for name in missing_names]
+
+    def with_index():
+        typo_index = TypoIndex(orphan_names)
+        return [typo_index.get_most_probable_typo(name) for name in missing_names]
+
+    expected = [matches[0] if matches else None for matches in with_difflib()]
+    assert with_index() == expected, "TypoIndex and difflib disagree!"
+
+    difflib_time = min(timeit.repeat(with_difflib, number=1, repeat=3))
+    index_time = min(timeit.repeat(with_index, number=1, repeat=3))
+
+    print("%d orphan names, %d missing names" % (len(orphan_names), len(missing_names)))
+    print("difflib   : %.3fs" % difflib_time)
+    print("TypoIndex : %.3fs (%.1fx)" % (index_time, difflib_time / index_time))
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:]])
@@ -0,0 +1,88 @@
+"""
+Asynchronous validation of configurations, for asyncio applications.
+
+Parsing and validating configurations is blocking work, so it is offloaded to
+an executor and never runs on the event loop. The schema is compiled once and
+shared by every validation. This module requires Python 3.6 or later.
+
+    schema = CompiledSchema(load_schema('confirm.yaml'), is_flat=True)
+    async for config_path, issues in validate_many(['a.ini', ('b.yaml', payload)], schema):
+        ...
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from confirm.batch import validate_config_content, validate_config_file
+from confirm.schema import compile_schema
+
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def _validate(config, schema, validate_options):
+    if isinstance(config, tuple):
+        config_path, config_content = config
+        return config_path, validate_config_content(config_path, config_content, schema, **validate_options)
+    return validate_config_file(config, schema, **validate_options)
+
+
+async def validate_config(config, schema, executor=None, **validate_options):
+    """
+    Validates a single configuration in an executor.
+
+    :param config: Path of a configuration file, or tuple of the path used to
+        infer the format of a configuration and of its content.
+    :param schema: Dictionary representing the confirm schema, or a `CompiledSchema`.
+    :param executor: Executor running the validation, the default executor of the loop if None.
+    :param validate_options: Keyword arguments of `Validation.validate`.
+
+    :returns: Tuple of the configuration path and of the list of `Issue` found.
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(executor, _validate, config, compile_schema(schema), validate_options)
+
+
+async def validate_many(configs, schema, executor=None, max_pending=None, **validate_options):
+    """
+    Validates many configurations in an executor, yielding the results as they complete.
+
+    :param configs: Iterable of configurations, as accepted by `validate_config`.
+    :param schema: Dictionary representing the confirm schema, or a `CompiledSchema`.
+    :param executor: Executor running the validations. By default, a thread pool
+        of `DEFAULT_MAX_WORKERS` threads is used for the duration of the call.
+    :param max_pending: Maximum number of validations submitted to the executor
+        at once, twice the number of threads of the default executor if None.
+        The configurations are consumed from `configs` as validations complete.
+    :param validate_options: Keyword arguments of `Validation.validate`.
+
+    :returns: Asynchronous generator of `validate_config` results, in completion order.
+    """
+    loop = asyncio.get_event_loop()
+    schema = compile_schema(schema)
+
+    own_executor = None
+    if executor is None:
+        executor = own_executor = ThreadPoolExecutor(DEFAULT_MAX_WORKERS)
+    if max_pending is None:
+        max_pending = DEFAULT_MAX_WORKERS * 2
+
+    pending = set()
+    try:
+        for config in configs:
+            pending.add(loop.run_in_executor(executor, _validate, config, schema, validate_options))
+            if len(pending) < max_pending:
+                continue
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor is not None:
+            own_executor.shutdown(wait=False)
@@ -0,0 +1,314 @@
+"""
+Validation and migration of many configuration files against a single schema,
+and inference of a schema from many configuration files.
+"""
+import glob
+import os
+import stat
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from confirm import issues
+from confirm.generator import SchemaInference, append_existing_values, get_config_types, write_config
+from confirm.instrumentation import count, measure
+from confirm.issues import Issue
+from confirm.schema import compile_schema
+from confirm.utils import check_config_structure
+from confirm.utils import get_config_file_extensions
+from confirm.utils import get_config_format
+from confirm.utils import load_config_file
+from confirm.utils import read_config_file
+from confirm.validator import Validation
+
+
+# Format written by `migrate_config_file`, the only one migrated in place.
+MIGRATION_FORMAT = 'ini'
+
+# Schema shared by the workers, set once per worker process.
+_worker_schema = None
+
+
+def _is_config_file(file_name):
+    return any(file_name.lower().endswith(extension) for extension in get_config_file_extensions())
+
+
+def expand_config_paths(paths, excluded_paths=()):
+    """
+    Expands configuration paths, globs and directories to a list of files.
+
+    Directories are walked recursively and only files with a known configuration
+    extension are kept. Files are returned sorted, without duplicates, so that the
+    validation output is deterministic.
+
+    :param excluded_paths: Paths of files left out when found in a directory or by
+        a glob, like the schema files, which share extensions with configurations.
+    :raises ValueError: If a path does not match any file.
+    """
+    excluded_paths = set(os.path.abspath(excluded_path) for excluded_path in excluded_paths)
+    config_file_paths = set()
+
+    def add_found_path(found_path):
+        if os.path.abspath(found_path) not in excluded_paths:
+            config_file_paths.add(found_path)
+
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, file_names in os.walk(path):
+                for file_name in file_names:
+                    if _is_config_file(file_name):
+                        add_found_path(os.path.join(directory, file_name))
+
+        elif os.path.isfile(path):
+            config_file_paths.add(path)
+
+        else:
+            matches = [match for match in glob.glob(path) if os.path.isfile(match)]
+            if not matches:
+                raise ValueError("No configuration file matches %s." % path)
+            for match in matches:
+                add_found_path(match)
+
+    return sorted(config_file_paths)
+
+
+def validate_config_file(config_file_path, schema, **validate_options):
+    """
+    Validates a single configuration file.
+
+    :param validate_options: Keyword arguments of `Validation.validate`.
+
+    :returns: Tuple of the configuration path and of the list of `Issue` found.
+    """
+    try:
+        config = read_config_file(config_file_path)
+        check_config_structure(config)
+    except Exception as e:
+        return config_file_path, [Issue(issues.UNLOADABLE_CONFIG, issues.ERROR, value=str(e))]
+
+    validation = Validation(config, schema)
+    validation.validate(**validate_options)
+    return config_file_path, validation.issues()
+
+
+def validate_config_content(config_file_path, config_file, schema, **validate_options):
+    """
+    Validates the content of a single configuration file.
+
+    :param config_file_path: Path of the configuration file, used to infer its format.
+    :param validate_options: Keyword arguments of `Validation.validate`.
+
+    :returns: List of `Issue` found.
+    """
+    try:
+        config = load_config_file(config_file_path, config_file)
+        check_config_structure(config)
+    except Exception as e:
+        return [Issue(issues.UNLOADABLE_CONFIG, issues.ERROR, value=str(e))]
+
+    validation = Validation(config, schema)
+    validation.validate(**validate_options)
+    return validation.issues()
+
+
+def _copy_schema(schema):
+    return dict(
+        (section_name, dict((option_name, dict(option or {})) for option_name, option in (section or {}).items()))
+        for section_name, section in schema.items()
+    )
+
+
+def migrate_config_file(config_file_path, schema, in_place=False):
+    """
+    Migrates a single configuration file.
+
+    The migrated configuration is always written in the .INI format. When
+    migrating in place, the file is only rewritten if its content changes,
+    through a temporary file renamed over the original one, and files of other
+    formats are skipped.
+
+    :param schema: Dictionary representing the confirm schema. It is not modified.
+
+    :returns: Tuple of the configuration path, of the migrated content (None when
+        migrating in place), of whether the content changed, of whether the file
+        was skipped, and of the error message if the file could not be migrated.
+    """
+    try:
+        with measure('read_config'), open(config_file_path, 'r') as opened_config_file:
+            config_file = opened_config_file.read()
+
+        if in_place and get_config_format(config_file_path, config_file) != MIGRATION_FORMAT:
+            return config_file_path, None, False, True, None
+
+        config = load_config_file(config_file_path, config_file)
+
+        migrated_config = StringIO()
+        write_config(append_existing_values(_copy_schema(schema), config), migrated_config)
+        migrated_config = migrated_config.getvalue()
+
+        changed = migrated_config != config_file
+        if in_place and changed:
+            write_file_atomically(config_file_path, migrated_config)
+    except Exception as e:
+        return config_file_path, None, False, False, str(e)
+
+    # The migrated content is not sent back from the workers when it was already written.
+    return config_file_path, None if in_place else migrated_config, changed, False, None
+
+
+def read_config_file_types(config_file_path, schema=None):
+    """
+    Reads the types accepted by the values of a single configuration file.
+
+    :param schema: Unused, for the signature shared by the functions mapped over configuration files.
+
+    :returns: Tuple of the configuration path, of the types returned by
+        `get_config_types` and of the error message if the file could not be loaded.
+    """
+    try:
+        with measure('read_config'), open(config_file_path, 'r') as opened_config_file:
+            config_file = opened_config_file.read()
+        config = load_config_file(config_file_path, config_file)
+        return config_file_path, get_config_types(config), None
+    except Exception as e:
+        return config_file_path, None, str(e)
+
+
+def write_file_atomically(file_path, content):
+    """
+    Replaces the content of a file, so that readers see either the old or the new content.
+    """
+    import tempfile
+
+    file_directory = os.path.dirname(os.path.abspath(file_path))
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=file_directory, prefix='.confirm-')
+    try:
+        with os.fdopen(file_descriptor, 'w') as temporary_file:
+            temporary_file.write(content)
+        os.chmod(temporary_path, stat.S_IMODE(os.stat(file_path).st_mode))
+        os.rename(temporary_path, file_path)
+    except Exception:
+        os.remove(temporary_path)
+        raise
+
+
+def _init_worker(schema):
+    global _worker_schema
+    _worker_schema = schema
+
+
+def _run_in_worker(args):
+    function, config_file_path, options = args
+    return function(config_file_path, _worker_schema, **options)
+
+
+def _map_config_files(function, config_file_paths, schema, jobs, options):
+    """
+    Calls `function(config_file_path, schema, **options)` for every configuration file.
+
+    With more than one job, the calls are spread over a pool of worker
+    processes, each receiving the schema only once.
+
+    :returns: Generator of the results, in the order of `config_file_paths`.
+    """
+    if jobs != 1 and len(config_file_paths) > 1:
+        # Only imported when a pool may be needed, since it slows down the startup.
+        import multiprocessing
+        jobs = jobs or multiprocessing.cpu_count()
+
+    if jobs == 1 or len(config_file_paths) <= 1:
+        for config_file_path in config_file_paths:
+            yield function(config_file_path, schema, **options)
+        return
+
+    pool = multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(schema,))
+    try:
+        chunk_size = max(1, len(config_file_paths) // (jobs * 4))
+        tasks = [(function, config_file_path, options) for config_file_path in config_file_paths]
+        for result in pool.imap(_run_in_worker, tasks, chunk_size):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def validate_config_files(config_file_paths, schema, jobs=1, manifest=None, **validate_options):
+    """
+    Validates many configuration files against a single schema.
+
+    :param config_file_paths: Paths of the configuration files to validate.
+    :param schema: Dictionary representing the confirm schema, or a `CompiledSchema`.
+    :param jobs: Number of worker processes. 0 means one per CPU.
+    :param manifest: Optional `ValidationManifest` of the schema and of the
+        validation options. Only the files which changed since their results were
+        stored are validated, and their new results are stored. The manifest
+        must be saved by the caller.
+    :param validate_options: Keyword arguments of `Validation.validate`.
+
+    :returns: Generator of `validate_config_file` results, in the order of `config_file_paths`.
+    """
+    if manifest is None:
+        return _map_config_files(validate_config_file, config_file_paths, compile_schema(schema), jobs, validate_options)
+    return _validate_changed_config_files(config_file_paths, schema, jobs, manifest, validate_options)
+
+
+def _validate_changed_config_files(config_file_paths, schema, jobs, manifest, validate_options):
+    cached_issues = {}
+    changed_config_file_paths = []
+    for config_file_path in config_file_paths:
+        file_issues = manifest.get_issues(config_file_path)
+        if file_issues is None:
+            changed_config_file_paths.append(config_file_path)
+        else:
+            cached_issues[config_file_path] = file_issues
+
+    count('cached_results', len(cached_issues))
+
+    results = _map_config_files(validate_config_file, changed_config_file_paths, compile_schema(schema), jobs, validate_options)
+    for config_file_path in config_file_paths:
+        if config_file_path in cached_issues:
+            yield config_file_path, cached_issues[config_file_path]
+            continue
+
+        config_file_path, file_issues = next(results)
+        manifest.set_issues(config_file_path, file_issues)
+        yield config_file_path, file_issues
+
+
+def migrate_config_files(config_file_paths, schema, jobs=1, in_place=False):
+    """
+    Migrates many configuration files using a single schema.
+
+    :param config_file_paths: Paths of the configuration files to migrate.
+    :param schema: Dictionary representing the confirm schema.
+    :param jobs: Number of worker processes. 0 means one per CPU.
+
+    :returns: Generator of `migrate_config_file` results, in the order of `config_file_paths`.
+    """
+    return _map_config_files(migrate_config_file, config_file_paths, schema, jobs, {'in_place': in_place})
+
+
+def infer_schema_from_files(config_file_paths, jobs=1, required_ratio=1.0):
+    """
+    Infers a schema from many configuration files.
+
+    The files are parsed in parallel, and only the types of their values are
+    sent back from the workers to be merged.
+
+    :param required_ratio: Minimal fraction of the configuration files defining
+        an option for it to be required.
+
+    :returns: Tuple of the dictionary representing the inferred schema and of
+        the list of (path, error message) of the files which could not be loaded.
+    """
+    schema_inference = SchemaInference()
+    errors = []
+
+    for config_file_path, config_types, error in _map_config_files(read_config_file_types, config_file_paths, None, jobs, {}):
+        if error is not None:
+            errors.append((config_file_path, error))
+        else:
+            schema_inference.add_config_types(config_types)
+
+    return schema_inference.get_schema(required_ratio), errors
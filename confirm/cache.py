@@ -0,0 +1,266 @@
+"""
+Persistent caches of parsed schema files and of validation results.
+
+Parsing a large YAML schema is the dominant cost of short confirm invocations,
+so the parsed schemas can be stored on disk and reused as long as the schema
+file does not change. Likewise, the validation results of configuration files
+can be replayed as long as neither the files nor the schema change.
+
+The cache files are often restored from CI caches, so they are stored as JSON
+rather than pickled, since loading them must not run arbitrary code.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from confirm.composition import SchemaResolver
+from confirm.issues import Issue
+from confirm.schema import CompiledSchema
+
+
+DEFAULT_MAX_ENTRIES = 64
+CACHE_ENTRY_EXTENSION = '.json'
+
+# Incremented when the validation results of a same configuration and schema may change.
+MANIFEST_VERSION = 3
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r') as json_file:
+            return json.load(json_file)
+    except Exception:
+        # Missing or corrupted files are simply treated as cache misses.
+        return None
+
+
+def _write_json(path, content):
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    # Write to a temporary file first, so that concurrent invocations never read a partial file.
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(file_descriptor, 'w') as json_file:
+            json.dump(content, json_file, default=str)
+        os.rename(temporary_path, path)
+    except Exception:
+        os.remove(temporary_path)
+        raise
+
+
+def _get_file_stat(file_path):
+    file_stat = os.stat(file_path)
+    return (file_stat.st_mtime, file_stat.st_size)
+
+
+def _get_file_hash(file_path):
+    with open(file_path, 'rb') as hashed_file:
+        return hashlib.sha256(hashed_file.read()).hexdigest()
+
+
+def _load_dependencies(entry):
+    # JSON turns the stat tuples into lists, which would never compare equal to the current stats.
+    try:
+        return dict((path, (tuple(file_stat), file_hash)) for path, (file_stat, file_hash) in entry['dependencies'].items())
+    except Exception:
+        return None
+
+
+class SchemaCache(object):
+    """
+    On-disk cache of parsed schemas.
+
+    Entries are keyed by the absolute path of the schema file. An entry is used
+    as is when the modification time and the size of the file, and of the files
+    it includes, did not change. Otherwise, the content hashes of the files are
+    compared to the ones of the entry, and the schema is resolved again only if
+    the content of a file actually changed.
+
+    When there are more than `max_entries` entries, the least recently used ones
+    are removed.
+
+    :param directory: Directory where the cache entries are stored.
+    :param max_entries: Maximum number of schemas kept in the cache.
+    """
+
+    def __init__(self, directory, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def _entry_path(self, schema_file_path):
+        key = hashlib.sha1(os.path.abspath(schema_file_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key + CACHE_ENTRY_EXTENSION)
+
+    def _write_entry(self, entry_path, entry):
+        _write_json(entry_path, entry)
+        self._prune()
+
+    def _prune(self):
+        entry_paths = [
+            os.path.join(self.directory, file_name)
+            for file_name in os.listdir(self.directory) if file_name.endswith(CACHE_ENTRY_EXTENSION)
+        ]
+        if len(entry_paths) <= self.max_entries:
+            return
+
+        entry_paths.sort(key=lambda entry_path: os.stat(entry_path).st_mtime, reverse=True)
+        for entry_path in entry_paths[self.max_entries:]:
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+
+    def load(self, schema_file_path):
+        """
+        Returns the parsed schema of `schema_file_path`, parsing the file only on cache misses.
+        """
+        return self.resolve(schema_file_path)[0]
+
+    def resolve(self, schema_file_path):
+        """
+        Like `SchemaResolver.resolve`, parsing the files only on cache misses.
+
+        :returns: Tuple of the dictionary representing the confirm schema and of its dependencies.
+        """
+        entry_path = self._entry_path(schema_file_path)
+        entry = _read_json(entry_path)
+        dependencies = _load_dependencies(entry)
+
+        if dependencies is not None:
+            try:
+                current_stats = dict((path, _get_file_stat(path)) for path in dependencies)
+            except OSError:
+                current_stats = None
+
+            if current_stats is not None and all(current_stats[path] == dependencies[path][0] for path in dependencies):
+                # Marks the entry as recently used.
+                os.utime(entry_path, None)
+                return entry['schema'], dependencies
+
+            if current_stats is not None and all(_get_file_hash(path) == dependencies[path][1] for path in dependencies):
+                dependencies = dict((path, (current_stats[path], dependencies[path][1])) for path in dependencies)
+                self._write_entry(entry_path, {'dependencies': dependencies, 'schema': entry['schema']})
+                return entry['schema'], dependencies
+
+        schema, dependencies = SchemaResolver().resolve(schema_file_path)
+        self._write_entry(entry_path, {'dependencies': dependencies, 'schema': schema})
+        return schema, dependencies
+
+    def clear(self):
+        """
+        Removes every entry of the cache.
+        """
+        if not os.path.isdir(self.directory):
+            return
+
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(CACHE_ENTRY_EXTENSION):
+                os.remove(os.path.join(self.directory, file_name))
+
+
+def get_manifest_key(schema, validate_options=None):
+    """
+    Returns a hash of the schema and of the validation options, which determine
+    the validation results of a configuration.
+    """
+    if isinstance(schema, CompiledSchema):
+        schema = schema.schema
+
+    content = json.dumps([MANIFEST_VERSION, schema, validate_options or {}], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class ValidationManifest(object):
+    """
+    Manifest of the validation results of configuration files, to validate
+    again only the files which changed.
+
+    The results of a file are replayed when its modification time and size did
+    not change, or when its content hash did not change. Every result is
+    discarded when the schema or the validation options change.
+
+    :param path: Path of the manifest file.
+    :param schema: Dictionary representing the confirm schema, or a `CompiledSchema`.
+    :param validate_options: Keyword arguments of `Validation.validate`.
+    """
+
+    def __init__(self, path, schema, validate_options=None):
+        self.path = path
+        self.key = get_manifest_key(schema, validate_options)
+        self._changed = False
+
+        # Absolute path of the configuration file -> {'stat', 'hash', 'issues'}.
+        self._entries = {}
+
+        # Stat and hash of the files about to be validated, taken before they are read.
+        self._pending = {}
+
+        manifest = _read_json(path)
+        if isinstance(manifest, dict) and manifest.get('key') == self.key:
+            try:
+                self._entries = dict(
+                    (config_file_path, {
+                        'stat': tuple(entry['stat']),
+                        'hash': entry['hash'],
+                        'issues': [Issue(**record) for record in entry['issues']],
+                    })
+                    for config_file_path, entry in manifest['entries'].items()
+                )
+            except Exception:
+                # Like unreadable manifests, corrupted ones are ignored.
+                self._entries = {}
+
+    def get_issues(self, config_file_path):
+        """
+        Returns the list of `Issue` of a configuration file, or None if it must be validated again.
+        """
+        absolute_path = os.path.abspath(config_file_path)
+        entry = self._entries.get(absolute_path)
+
+        try:
+            file_stat = _get_file_stat(absolute_path)
+            if entry is not None and entry['stat'] == file_stat:
+                return entry['issues']
+
+            content_hash = _get_file_hash(absolute_path)
+        except (IOError, OSError):
+            return None
+
+        if entry is not None and entry['hash'] == content_hash:
+            entry['stat'] = file_stat
+            self._changed = True
+            return entry['issues']
+
+        self._pending[absolute_path] = (file_stat, content_hash)
+        return None
+
+    def set_issues(self, config_file_path, file_issues):
+        """
+        Stores the list of `Issue` of a configuration file for which `get_issues` returned None.
+        """
+        absolute_path = os.path.abspath(config_file_path)
+        pending = self._pending.pop(absolute_path, None)
+        if pending is None:
+            return
+
+        self._entries[absolute_path] = {'stat': pending[0], 'hash': pending[1], 'issues': list(file_issues)}
+        self._changed = True
+
+    def save(self):
+        """
+        Writes the manifest, if any result changed.
+        """
+        if self._changed:
+            entries = dict(
+                (config_file_path, {
+                    'stat': entry['stat'],
+                    'hash': entry['hash'],
+                    'issues': [issue.to_dict() for issue in entry['issues']],
+                })
+                for config_file_path, entry in self._entries.items()
+            )
+            _write_json(self.path, {'key': self.key, 'entries': entries})
+            self._changed = False
@@ -0,0 +1,220 @@
+"""
+Composition of schemas split across many files.
+
+A schema file can include other schema files, whose sections are merged into
+its own, and sections can extend other sections or templates:
+
+    $include:
+      - common.yaml
+      - teams/*.yaml
+
+    $templates:
+      server:
+        host:
+          required: true
+
+    http_server:
+      $extends: server
+      port:
+        type: int
+
+Included paths are relative to the including file. When a section or an option
+is defined many times, the definitions are merged, the last one winning: the
+includes in their order, then the including file itself. Templates are only
+used through `$extends`, and are not part of the resolved schema. Sections can
+also be nested, and are then named by their dotted path (see `flatten_schema`).
+"""
+import glob
+import hashlib
+import os
+
+from confirm.schema import flatten_schema
+from confirm.utils import load_schema_file
+
+
+INCLUDE_DIRECTIVE = '$include'
+TEMPLATES_DIRECTIVE = '$templates'
+EXTENDS_DIRECTIVE = '$extends'
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _copy_option(option):
+    return dict(option) if isinstance(option, dict) else option
+
+
+def _merge_options(target_section, section):
+    for option_name, option in section.items():
+        existing_option = target_section.get(option_name)
+        if isinstance(existing_option, dict) and isinstance(option, dict):
+            existing_option.update(option)
+        else:
+            target_section[option_name] = _copy_option(option)
+
+
+def _merge_sections(target_sections, sections):
+    """
+    Merges sections into `target_sections`, without modifying `sections`.
+    """
+    for section_name, section in sections.items():
+        target_section = target_sections.get(section_name)
+        if isinstance(target_section, dict) and isinstance(section, dict):
+            _merge_options(target_section, section)
+        elif isinstance(section, dict):
+            target_sections[section_name] = dict((option_name, _copy_option(option)) for option_name, option in section.items())
+        else:
+            target_sections[section_name] = section
+
+
+class _Composition(object):
+    """
+    Sections and templates of a schema file, merged with the ones of its includes.
+    """
+
+    def __init__(self):
+        self.sections = {}
+        self.templates = {}
+
+    def merge(self, composition):
+        _merge_sections(self.sections, composition.sections)
+        _merge_sections(self.templates, composition.templates)
+
+
+def _resolve_extends(composition):
+    """
+    :returns: Dictionary of the sections of the composition, with their `$extends` resolved.
+    """
+    resolved_sections = {}
+
+    def resolve(section_name, sections, stack):
+        key = (sections is composition.templates, section_name)
+        if key in resolved_sections:
+            return resolved_sections[key]
+        if key in stack:
+            raise ValueError("Schema sections extend each other: %s." % ' -> '.join(name for _, name in stack + [key]))
+
+        section = sections[section_name]
+        if not isinstance(section, dict) or EXTENDS_DIRECTIVE not in section:
+            resolved_sections[key] = section
+            return section
+
+        resolved_section = {}
+        for base_name in _as_list(section[EXTENDS_DIRECTIVE]):
+            if base_name in composition.templates:
+                base_section = resolve(base_name, composition.templates, stack + [key])
+            elif base_name in composition.sections:
+                base_section = resolve(base_name, composition.sections, stack + [key])
+            else:
+                raise ValueError("Section %s extends %s, which is not defined." % (section_name, base_name))
+            _merge_options(resolved_section, dict((name, _copy_option(option)) for name, option in (base_section or {}).items()))
+
+        _merge_options(resolved_section, dict(item for item in section.items() if item[0] != EXTENDS_DIRECTIVE))
+        resolved_sections[key] = resolved_section
+        return resolved_section
+
+    return dict(
+        (section_name, resolve(section_name, composition.sections, []))
+        for section_name in composition.sections
+    )
+
+
+class SchemaResolver(object):
+    """
+    Loads schemas split across files with `$include`, `$templates` and `$extends`.
+
+    Within a resolution, a file included many times is read and merged once.
+    Parsed files are memoized by content hash, so reusing a resolver for many
+    schemas, or for the same schema after some of its files changed, only parses
+    the files which are new or changed.
+    """
+
+    def __init__(self):
+        # Content hash -> parsed schema file.
+        self._parsed_files = {}
+
+    def _read(self, schema_file_path):
+        schema_stat = os.stat(schema_file_path)
+        with open(schema_file_path, 'rb') as schema_file:
+            content = schema_file.read()
+        content_hash = hashlib.sha256(content).hexdigest()
+
+        parsed_file = self._parsed_files.get(content_hash)
+        if parsed_file is None:
+            parsed_file = load_schema_file(content) or {}
+            if not isinstance(parsed_file, dict):
+                raise ValueError("The schema file %s is not a mapping of sections." % schema_file_path)
+            self._parsed_files[content_hash] = parsed_file
+
+        return (schema_stat.st_mtime, schema_stat.st_size), content_hash, parsed_file
+
+    def _get_include_paths(self, schema_file_path, include):
+        include_path = os.path.normpath(os.path.join(os.path.dirname(schema_file_path), include))
+        if not glob.has_magic(include_path):
+            return [include_path]
+
+        include_paths = sorted(path for path in glob.glob(include_path) if os.path.isfile(path))
+        if not include_paths:
+            raise ValueError("No schema file matches %s, included by %s." % (include, schema_file_path))
+        return include_paths
+
+    def _compose(self, schema_file_path, stack, compositions, dependencies):
+        if schema_file_path in stack:
+            raise ValueError("Schema files include each other: %s." % ' -> '.join(stack + [schema_file_path]))
+        if schema_file_path in compositions:
+            return compositions[schema_file_path]
+
+        file_stat, content_hash, parsed_file = self._read(schema_file_path)
+        dependencies[schema_file_path] = (file_stat, content_hash)
+
+        composition = _Composition()
+        for include in _as_list(parsed_file.get(INCLUDE_DIRECTIVE)):
+            for include_path in self._get_include_paths(schema_file_path, include):
+                composition.merge(self._compose(include_path, stack + [schema_file_path], compositions, dependencies))
+
+        _merge_sections(composition.templates, parsed_file.get(TEMPLATES_DIRECTIVE) or {})
+        _merge_sections(composition.sections, dict(
+            (section_name, section) for section_name, section in parsed_file.items()
+            if section_name not in (INCLUDE_DIRECTIVE, TEMPLATES_DIRECTIVE)
+        ))
+
+        compositions[schema_file_path] = composition
+        return composition
+
+    def resolve(self, schema_file_path):
+        """
+        Resolves a schema file and the files it includes.
+
+        :returns: Tuple of the dictionary representing the confirm schema, with its
+            nested sections flattened, and of the dependencies of the schema, a
+            dictionary of the absolute path of every file read to its `(mtime, size)`
+            stat and content hash.
+        :raises ValueError: If the files include each other, if the sections extend
+            each other, or if an include or an extended section does not exist.
+        """
+        dependencies = {}
+        composition = self._compose(os.path.abspath(schema_file_path), [], {}, dependencies)
+        return flatten_schema(_resolve_extends(composition)), dependencies
+
+    def retain(self, content_hashes):
+        """
+        Forgets the parsed files whose content hash is not in `content_hashes`,
+        so that long-lived resolvers do not keep every version of the files.
+        """
+        for content_hash in set(self._parsed_files) - set(content_hashes):
+            del self._parsed_files[content_hash]
+
+
+def load_schema(schema_file_path, resolver=None):
+    """
+    Loads a schema file, resolving its includes and extended sections.
+
+    :param resolver: `SchemaResolver` memoizing the parsed files, a new one if None.
+    :returns: Dictionary representing the confirm schema.
+    """
+    return (resolver or SchemaResolver()).resolve(schema_file_path)[0]
@@ -1,12 +1,18 @@
 """
 Module for automatic generation of configuration templates.
 """
+from collections import OrderedDict
 try:
-    from ConfigParser import SafeConfigParser
+    from StringIO import StringIO
 except ImportError:
-    from configparser import ConfigParser as SafeConfigParser
+    from io import StringIO
+try:
+    from html import escape
+except ImportError:
+    from cgi import escape
 
 from confirm import utils
+from confirm.schema import TYPE_COERCERS
 
 
 def _get_included_schema_sections_options(config, include_all):
@@ -30,6 +36,11 @@ def generate_config_parser(config, include_all=False):
     configuration file will be stored in the *value* field of an option.
     """
 
+    try:
+        from configparser import ConfigParser as SafeConfigParser
+    except ImportError:
+        from ConfigParser import SafeConfigParser
+
     # The allow_no_value allows us to output commented lines.
     config_parser = SafeConfigParser(allow_no_value=True)
     for section_name, option_name in _get_included_schema_sections_options(config, include_all):
@@ -55,6 +66,60 @@ def generate_config_parser(config, include_all=False):
     return config_parser
 
 
+def write_config(config, stream, include_all=False):
+    """
+    Writes a configuration file from a configuration dictionary, straight to a stream.
+
+    The output is the same as writing the config parser of `generate_config_parser`,
+    but only the section being written is held in memory.
+
+    :param config: Same dictionary as for `generate_config_parser`.
+    :param stream: File object where the configuration file is written.
+    """
+    section_name = None
+    section_lines = None
+
+    for option_section_name, option_name in _get_included_schema_sections_options(config, include_all):
+
+        # Sections are yielded in order, so a section is complete as soon as the next one starts.
+        if option_section_name != section_name:
+            if section_lines is not None:
+                _write_config_section(stream, section_name, section_lines)
+            section_name = option_section_name
+            section_lines = OrderedDict()
+
+        option = config[section_name][option_name]
+
+        # Like in a config parser, lines are keyed by their lowercased text and
+        # setting an existing key keeps its original position.
+        if option.get('required'):
+            section_lines['# required'] = None
+
+        section_lines[('# ' + option.get('description', 'No description provided.')).lower()] = None
+
+        if option.get('deprecated'):
+            section_lines['# deprecated'] = None
+
+        section_lines[option_name.lower()] = _get_value(option)
+
+        section_lines[''] = None
+
+    if section_lines is not None:
+        _write_config_section(stream, section_name, section_lines)
+
+
+def _write_config_section(stream, section_name, section_lines):
+    stream.write('[%s]\n' % section_name)
+
+    for key, value in section_lines.items():
+        if value is None:
+            stream.write(key + '\n')
+        else:
+            stream.write('%s = %s\n' % (key, value.replace('\n', '\n\t')))
+
+    stream.write('\n')
+
+
 def _include_in_config(option):
     # We include an option if it is required, or if
     # it was already specified in the original configuration file.
@@ -70,57 +135,161 @@ def _get_value(option):
         return 'TO FILL'
 
 
-def generate_documentation(schema):
-    """
-    Generates reStructuredText documentation from a Confirm file.
+DOCUMENTATION_TITLE = "Configuration documentation"
 
-    :param schema: Dictionary representing the Confirm schema.
 
-    :returns: String representing the reStructuredText documentation.
+class DocumentationWriter(object):
+    """
+    Base class of the documentation backends, writing to a stream as the schema is walked.
     """
 
-    documentation_title = "Configuration documentation"
-    documentation = documentation_title + "\n"
-    documentation += "=" * len(documentation_title) + '\n'
+    def __init__(self, stream):
+        self.stream = stream
 
-    for section_name in schema:
-        section_created = False
+    def start(self, title):
+        pass
 
-        for option_name in schema[section_name]:
+    def section(self, section_name):
+        raise NotImplementedError()
+
+    def option(self, option_name, option):
+        raise NotImplementedError()
+
+    def finish(self):
+        pass
 
-            option = schema[section_name][option_name]
 
-            if not section_created:
-                documentation += '\n'
-                documentation += section_name + '\n'
-                documentation += '-' * len(section_name) + '\n'
-                section_created = True
+class RstDocumentationWriter(DocumentationWriter):
 
-            documentation += '\n'
-            documentation += option_name + '\n'
-            documentation += '~' * len(option_name) + '\n'
+    def start(self, title):
+        self.stream.write(title + '\n' + '=' * len(title) + '\n')
 
-            if option.get('required'):
+    def section(self, section_name):
+        self.stream.write('\n' + section_name + '\n' + '-' * len(section_name) + '\n')
 
-                documentation += "** This option is required! **\n"
+    def option(self, option_name, option):
+        write = self.stream.write
+        write('\n' + option_name + '\n' + '~' * len(option_name) + '\n')
 
-            if option.get('type'):
+        if option.get('required'):
+            write("** This option is required! **\n")
+
+        if option.get('type'):
+            write('*Type : %s.*\n' % option.get('type'))
 
-                documentation += '*Type : %s.*\n' % option.get('type')
+        if option.get('description'):
+            write(option.get('description') + '\n')
 
-            if option.get('description'):
+        if option.get('default'):
+            write('The default value is %s.\n' % option.get('default'))
+
+        if option.get('deprecated'):
+            write("** This option is deprecated! **\n")
+
+
+class MarkdownDocumentationWriter(DocumentationWriter):
+
+    def start(self, title):
+        self.stream.write('# %s\n\n' % title)
+
+    def section(self, section_name):
+        self.stream.write('## %s\n\n' % section_name)
+
+    def option(self, option_name, option):
+        write = self.stream.write
+        write('### %s\n\n' % option_name)
+
+        if option.get('required'):
+            write("**This option is required!**\n\n")
 
-                documentation += option.get('description') + '\n'
+        if option.get('type'):
+            write('*Type : %s.*\n\n' % option.get('type'))
 
-            if option.get('default'):
+        if option.get('description'):
+            write(option.get('description') + '\n\n')
 
-                documentation += 'The default value is %s.\n' % option.get('default')
+        if option.get('default'):
+            write('The default value is `%s`.\n\n' % option.get('default'))
+
+        if option.get('deprecated'):
+            write("**This option is deprecated!**\n\n")
+
+
+class HtmlDocumentationWriter(DocumentationWriter):
+
+    def start(self, title):
+        self.stream.write('<!DOCTYPE html>\n<html>\n<head><title>%s</title></head>\n<body>\n<h1>%s</h1>\n' % (escape(title), escape(title)))
+
+    def section(self, section_name):
+        self.stream.write('<h2>%s</h2>\n' % escape(section_name))
+
+    def option(self, option_name, option):
+        write = self.stream.write
+        write('<h3>%s</h3>\n' % escape(option_name))
+
+        if option.get('required'):
+            write('<p><strong>This option is required!</strong></p>\n')
+
+        if option.get('type'):
+            write('<p><em>Type : %s.</em></p>\n' % escape(str(option.get('type'))))
+
+        if option.get('description'):
+            write('<p>%s</p>\n' % escape(option.get('description')))
+
+        if option.get('default'):
+            write('<p>The default value is <code>%s</code>.</p>\n' % escape(str(option.get('default'))))
+
+        if option.get('deprecated'):
+            write('<p><strong>This option is deprecated!</strong></p>\n')
 
-            if option.get('deprecated'):
+    def finish(self):
+        self.stream.write('</body>\n</html>\n')
 
-                documentation += "** This option is deprecated! **\n"
 
-    return documentation
+DOCUMENTATION_WRITERS = {
+    'rst': RstDocumentationWriter,
+    'markdown': MarkdownDocumentationWriter,
+    'html': HtmlDocumentationWriter,
+}
+
+
+def write_documentation(schema, stream, documentation_format='rst'):
+    """
+    Writes the documentation of a Confirm schema to a stream, as the schema is walked.
+
+    :param schema: Dictionary representing the Confirm schema.
+    :param stream: File object where the documentation is written.
+    :param documentation_format: Key of DOCUMENTATION_WRITERS.
+    """
+    writer = DOCUMENTATION_WRITERS[documentation_format](stream)
+    writer.start(DOCUMENTATION_TITLE)
+
+    for section_name in schema:
+
+        # Sections without any option are not documented.
+        if not schema[section_name]:
+            continue
+
+        writer.section(section_name)
+
+        for option_name in schema[section_name]:
+            writer.option(option_name, schema[section_name][option_name])
+
+    writer.finish()
+
+
+def generate_documentation(schema, documentation_format='rst'):
+    """
+    Generates reStructuredText documentation from a Confirm file.
+
+    :param schema: Dictionary representing the Confirm schema.
+    :param documentation_format: Key of DOCUMENTATION_WRITERS.
+
+    :returns: String representing the reStructuredText documentation.
+    """
+    documentation = StringIO()
+    write_documentation(schema, documentation, documentation_format)
+    return documentation.getvalue()
 
 
 def append_existing_values(schema, config):
@@ -139,17 +308,129 @@ def append_existing_values(schema, config):
     return schema
 
 
-def generate_schema_file(config_file):
+# Types accepted by the string values already seen, which repeat a lot across configurations.
+_string_types_cache = {}
+STRING_TYPES_CACHE_SIZE = 65536
+
+
+def _get_types(value):
+    value_types = set()
+    for type_name, coerce in TYPE_COERCERS.items():
+        try:
+            coerce(value)
+        except (TypeError, ValueError):
+            continue
+        value_types.add(type_name)
+    return frozenset(value_types)
+
+
+def get_value_types(value):
     """
-    Generates a basic confirm schema file from a configuration file.
+    Returns the types of the schema which accept a configuration value.
     """
+    # Booleans and floats are also accepted by int, which is not what they look like.
+    if isinstance(value, bool):
+        return frozenset(('bool', 'str'))
+    if isinstance(value, float):
+        return frozenset(('float', 'str'))
 
-    config = utils.load_config_from_ini_file(config_file)
-    schema = {}
+    if not hasattr(value, 'split'):
+        return _get_types(value)
 
-    for section_name in config:
-        for option_name in config[section_name]:
-            schema.setdefault(section_name, {}).setdefault(option_name, {})
-            schema[section_name][option_name]['description'] = 'No description provided.'
+    value_types = _string_types_cache.get(value)
+    if value_types is None:
+        if len(_string_types_cache) >= STRING_TYPES_CACHE_SIZE:
+            _string_types_cache.clear()
+        value_types = _string_types_cache[value] = _get_types(value)
+    return value_types
+
+
+def get_config_types(config):
+    """
+    Returns the types accepted by the values of a configuration.
+
+    :returns: Dictionary of the types accepted by each option of each section,
+        None when the value of the option is not defined.
+    """
+    config_types = {}
+    for section_name, section in config.items():
+        if not isinstance(section, dict):
+            continue
+
+        config_types[section_name] = dict(
+            (option_name, None if value is None else get_value_types(value))
+            for option_name, value in section.items()
+        )
+    return config_types
+
+
+class SchemaInference(object):
+    """
+    Infers a schema from the types of many configurations, as returned by `get_config_types`.
+
+    The type of an option is the most specific type accepting all its values,
+    and an option is required when it is defined in enough configurations.
+    """
+
+    # From the most specific type to the least specific one.
+    TYPES_PREFERENCE = ('int', 'float', 'bool', 'str', 'list')
+
+    def __init__(self):
+        self.config_count = 0
+
+        # Section name -> option name -> [count of the configurations defining the option, accepted types].
+        self._options = {}
+
+    def add_config_types(self, config_types):
+        self.config_count += 1
+
+        for section_name, section_types in config_types.items():
+            section_options = self._options.setdefault(section_name, {})
+
+            for option_name, value_types in section_types.items():
+                option = section_options.setdefault(option_name, [0, None])
+                option[0] += 1
+                if value_types is not None:
+                    option[1] = value_types if option[1] is None else option[1] & value_types
+
+    def _get_type(self, value_types):
+        for type_name in self.TYPES_PREFERENCE:
+            if type_name in value_types:
+                return type_name
+        return None
+
+    def get_schema(self, required_ratio=1.0):
+        """
+        :param required_ratio: Minimal fraction of the configurations defining an
+            option for it to be required.
+
+        :returns: Dictionary representing the inferred schema.
+        """
+        schema = {}
+
+        for section_name, section_options in self._options.items():
+            for option_name, (count, value_types) in section_options.items():
+                option = {'description': 'No description provided.'}
+
+                option_type = self._get_type(value_types) if value_types is not None else None
+                if option_type is not None:
+                    option['type'] = option_type
+
+                if count >= required_ratio * self.config_count:
+                    option['required'] = True
+
+                schema.setdefault(section_name, {})[option_name] = option
+
+        return schema
+
+
+def generate_schema_file(config_file, required_ratio=1.0):
+    """
+    Generates a confirm schema file from a configuration file.
+
+    The types of the options are inferred from their values.
+    """
 
-    return utils.dump_schema_file(schema)
+    schema_inference = SchemaInference()
+    schema_inference.add_config_types(get_config_types(utils.load_config_from_ini_file(config_file)))
+    return utils.dump_schema_file(schema_inference.get_schema(required_ratio))
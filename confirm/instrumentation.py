@@ -0,0 +1,104 @@
+"""
+Instrumentation of the time spent in each phase of confirm.
+
+Instrumentation is disabled by default, and the hooks spread through the code
+base then do nothing. It is enabled for the current process with `instrument`:
+
+    with instrument(Instrumentation()) as instrumentation:
+        validation.validate()
+    print(instrumentation.summary())
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+try:
+    from time import perf_counter as timer
+except ImportError:
+    from time import time as timer
+
+
+# Instrumentation receiving the measures of the current process, if any.
+_instrumentation = None
+
+
+class Instrumentation(object):
+    """
+    Accumulates the durations of the phases and the counters reported by the hooks.
+
+    :param callback: Optional function called with `(name, duration, count)` for
+        every measure, the duration being None for counters.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.durations = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    def add_duration(self, phase, duration):
+        self.durations[phase] += duration
+        self.calls[phase] += 1
+        if self.callback is not None:
+            self.callback(phase, duration, 1)
+
+    def add_count(self, counter, count):
+        self.counters[counter] += count
+        if self.callback is not None:
+            self.callback(counter, None, count)
+
+    def summary(self):
+        """
+        Returns a human-readable summary of the measures.
+        """
+        lines = ['%-24s %8s %12s' % ('Phase', 'Calls', 'Total (s)')]
+        for phase in sorted(self.durations, key=self.durations.get, reverse=True):
+            lines.append('%-24s %8d %12.6f' % (phase, self.calls[phase], self.durations[phase]))
+
+        lines.append('')
+        lines.append('%-24s %8s' % ('Counter', 'Value'))
+        for counter in sorted(self.counters):
+            lines.append('%-24s %8d' % (counter, self.counters[counter]))
+
+        return '\n'.join(lines) + '\n'
+
+
+@contextmanager
+def instrument(instrumentation):
+    """
+    Sends the measures of the current process to `instrumentation` within the block.
+    """
+    global _instrumentation
+    previous_instrumentation = _instrumentation
+    _instrumentation = instrumentation
+    try:
+        yield instrumentation
+    finally:
+        _instrumentation = previous_instrumentation
+
+
+@contextmanager
+def measure(phase):
+    """
+    Measures the duration of a phase, if instrumentation is enabled.
+    """
+    instrumentation = _instrumentation
+    if instrumentation is None:
+        yield
+        return
+
+    start = timer()
+    try:
+        yield
+    finally:
+        instrumentation.add_duration(phase, timer() - start)
+
+
+def count(counter, value=1):
+    """
+    Increments a counter, if instrumentation is enabled.
+    """
+    if _instrumentation is not None:
+        _instrumentation.add_count(counter, value)
+
+
+def is_enabled():
+    return _instrumentation is not None
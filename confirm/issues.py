@@ -0,0 +1,77 @@
+"""
+Issues found while validating a configuration.
+"""
+from collections import namedtuple
+
+
+ERROR = 'error'
+WARNING = 'warning'
+
+UNDEFINED_SECTION = 'undefined-section'
+DEPRECATED_SECTION = 'deprecated-section'
+MISSING_SECTION = 'missing-section'
+SECTION_TYPO = 'section-typo'
+UNDEFINED_OPTION = 'undefined-option'
+DEPRECATED_OPTION = 'deprecated-option'
+MISSING_OPTION = 'missing-option'
+OPTION_TYPO = 'option-typo'
+INVALID_EXPECTED_TYPE = 'invalid-expected-type'
+INVALID_VALUE = 'invalid-value'
+UNLOADABLE_CONFIG = 'unloadable-config'
+INVALID_CONSTRAINT = 'invalid-constraint'
+INVALID_CHOICE = 'invalid-choice'
+OUT_OF_RANGE = 'out-of-range'
+PATTERN_MISMATCH = 'pattern-mismatch'
+INVALID_LENGTH = 'invalid-length'
+
+MESSAGES = {
+    UNDEFINED_SECTION: "Section %(section)s is not defined in the schema file.",
+    DEPRECATED_SECTION: "Deprecated section %(section)s is present!",
+    MISSING_SECTION: "Missing required section %(section)s.",
+    SECTION_TYPO: "Possible typo for section %(section)s : %(suggestion)s.",
+    UNDEFINED_OPTION: "Option %(option)s of section %(section)s is not defined in the schema file.",
+    DEPRECATED_OPTION: "Deprecated option %(option)s is present in section %(section)s!",
+    MISSING_OPTION: "Missing required option %(option)s in section %(section)s.",
+    OPTION_TYPO: "Possible typo for option %(option)s : %(suggestion)s.",
+    INVALID_EXPECTED_TYPE: "Invalid expected type for option %(option)s : %(expected_type)s.",
+    INVALID_VALUE: "Invalid value for type %(expected_type)s : %(value)s.",
+    UNLOADABLE_CONFIG: "Could not load configuration file : %(value)s",
+    INVALID_CONSTRAINT: "Invalid constraint for option %(option)s : %(constraint)s.",
+    INVALID_CHOICE: "Invalid value for option %(option)s of section %(section)s : %(value)s is not one of %(constraint)s.",
+    OUT_OF_RANGE: "Invalid value for option %(option)s of section %(section)s : %(value)s is not %(constraint)s.",
+    PATTERN_MISMATCH: "Invalid value for option %(option)s of section %(section)s : %(value)s does not match %(constraint)s.",
+    INVALID_LENGTH: "Invalid length for option %(option)s of section %(section)s : %(value)s is not %(constraint)s.",
+}
+
+# Messages used instead of MESSAGES when the issue has a suggestion.
+MESSAGES_WITH_SUGGESTION = {
+    MISSING_SECTION: "Missing required section %(section)s (%(suggestion)s is a possible typo!).",
+    MISSING_OPTION: "Missing required option %(option)s in section %(section)s (%(suggestion)s is a possible typo!).",
+}
+
+
+class Issue(namedtuple('Issue', 'code severity section option value expected_type suggestion constraint')):
+    """
+    Issue found while validating a configuration.
+
+    Issues are plain tuples, their message is only rendered when requested.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, code, severity, section=None, option=None, value=None, expected_type=None, suggestion=None, constraint=None):
+        return super(Issue, cls).__new__(cls, code, severity, section, option, value, expected_type, suggestion, constraint)
+
+    @property
+    def message(self):
+        template = MESSAGES_WITH_SUGGESTION.get(self.code) if self.suggestion else None
+        return (template or MESSAGES[self.code]) % self._asdict()
+
+    def is_error(self):
+        return self.severity == ERROR
+
+    def to_dict(self):
+        return dict((field, value) for field, value in zip(self._fields, self) if value is not None)
+
+    def __str__(self):
+        return self.message
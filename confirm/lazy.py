@@ -0,0 +1,194 @@
+"""
+Lazy view of .INI configuration files, backed by a memory-mapped file.
+
+The file is scanned once to index the offsets of its sections and options, and
+the values are only decoded when they are accessed. Validating a large file
+against a schema which only defines some of its options then never decodes
+the other values, and the file content is never copied in memory as a whole.
+"""
+import mmap
+import re
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from confirm.utils import INI_COMMENT_PREFIXES, INI_DEFAULT_SECTION, INI_OPTION_REGEX, INI_SECTION_REGEX
+from confirm.utils import _join_ini_value
+
+
+ENCODING = 'utf-8'
+
+_COMMENT_PREFIXES = tuple(prefix.encode('ascii') for prefix in INI_COMMENT_PREFIXES)
+_SECTION_REGEX = re.compile(INI_SECTION_REGEX.pattern.encode('ascii'))
+_OPTION_REGEX = re.compile(INI_OPTION_REGEX.pattern.encode('ascii'))
+
+
+def _decode_value(data, start, end):
+    lines = data[start:end].decode(ENCODING).split('\n')
+
+    # The offsets span the first line of the value and its continuation lines,
+    # with the empty and comment lines in between.
+    value_lines = [lines[0].strip()]
+    for line in lines[1:]:
+        stripped_line = line.strip()
+        if not stripped_line or stripped_line[0] not in INI_COMMENT_PREFIXES:
+            value_lines.append(stripped_line)
+
+    return _join_ini_value(value_lines)
+
+
+class LazySection(Mapping):
+    """
+    Options of a section, decoded on first access.
+    """
+
+    def __init__(self, data, option_offsets, default_offsets):
+        # The section does not reference its configuration, so that the file is
+        # unmapped as soon as the configuration is not used anymore.
+        self._data = data
+        self._option_offsets = option_offsets
+        self._default_offsets = default_offsets
+        self._values = {}
+
+    def __getitem__(self, option_name):
+        value = self._values.get(option_name)
+        if value is not None:
+            return value
+
+        offsets = self._option_offsets.get(option_name) or self._default_offsets.get(option_name)
+        if offsets is None:
+            raise KeyError(option_name)
+
+        value = self._values[option_name] = _decode_value(self._data, *offsets)
+        return value
+
+    def __iter__(self):
+        for option_name in self._option_offsets:
+            yield option_name
+        for option_name in self._default_offsets:
+            if option_name not in self._option_offsets:
+                yield option_name
+
+    def __len__(self):
+        return len(self._option_offsets) + sum(1 for option_name in self._default_offsets if option_name not in self._option_offsets)
+
+    def __contains__(self, option_name):
+        return option_name in self._option_offsets or option_name in self._default_offsets
+
+
+class LazyConfig(Mapping):
+    """
+    Mapping of the sections of a .INI file to `LazySection` mappings of their options.
+
+    The parsing follows the rules of `ConfigParser` without interpolation, like
+    `load_config_from_ini_file`: option names are lowercased, comments are whole
+    lines starting with `#` or `;`, indented lines continue the value of the
+    previous option, and values of the DEFAULT section apply to every section.
+
+    :param config_file_path: Path of the .INI file, which must stay unchanged while the view is used.
+    :raises ValueError: If the file cannot be parsed, or defines a section or an option twice.
+    """
+
+    # Values are never mappings, so `Validation` does not look for nested sections, which would decode every value.
+    flat = True
+
+    def __init__(self, config_file_path):
+        with open(config_file_path, 'rb') as config_file:
+            try:
+                self._data = mmap.mmap(config_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped.
+                self._data = b''
+
+        self._sections = {}
+        self._index()
+
+    def _index(self):
+        data = self._data
+        data_size = len(data)
+
+        # Section name -> option name -> (start, end) offsets of the value.
+        section_offsets = {}
+        section_name = None
+        option_offsets = None
+
+        # Name, indentation, start and end offsets of the option being read.
+        option = None
+
+        line_number = 0
+        line_start = 0
+        while line_start < data_size:
+            line_end = data.find(b'\n', line_start)
+            if line_end == -1:
+                line_end = data_size
+            line = data[line_start:line_end]
+            line_number += 1
+
+            stripped_line = line.strip()
+            if not stripped_line or stripped_line.startswith(_COMMENT_PREFIXES):
+                line_start = line_end + 1
+                continue
+
+            indentation = len(line) - len(line.lstrip())
+            if option is not None and indentation > option[1]:
+                option[3] = line_end
+                line_start = line_end + 1
+                continue
+
+            if option is not None:
+                option_offsets[option[0]] = (option[2], option[3])
+                option = None
+
+            section_match = _SECTION_REGEX.match(stripped_line)
+            if section_match:
+                section_name = section_match.group('header').decode(ENCODING)
+                # Like in `ConfigParser`, only the DEFAULT section can be defined many times.
+                if section_name in section_offsets and section_name != INI_DEFAULT_SECTION:
+                    raise ValueError("Section %s defined twice, at line %d." % (section_name, line_number))
+                option_offsets = section_offsets.setdefault(section_name, {})
+                line_start = line_end + 1
+                continue
+
+            if section_name is None:
+                raise ValueError("Option defined before any section header at line %d." % line_number)
+
+            option_match = _OPTION_REGEX.match(stripped_line)
+            if not option_match:
+                raise ValueError("Could not parse line %d : %s" % (line_number, stripped_line.decode(ENCODING)))
+
+            option_name = option_match.group('option').rstrip().decode(ENCODING).lower()
+            if option_name in option_offsets:
+                raise ValueError("Option %s of section %s defined twice, at line %d." % (option_name, section_name, line_number))
+
+            value_start = line_start + indentation
+            option = [option_name, indentation, value_start + option_match.start('value'), value_start + option_match.end('value')]
+            line_start = line_end + 1
+
+        if option is not None:
+            option_offsets[option[0]] = (option[2], option[3])
+
+        default_offsets = section_offsets.pop(INI_DEFAULT_SECTION, {})
+        for section_name, option_offsets in section_offsets.items():
+            # Like `config_parser_to_dict`, sections without any option are left out.
+            if option_offsets or default_offsets:
+                self._sections[section_name] = LazySection(data, option_offsets, default_offsets)
+
+    def __getitem__(self, section_name):
+        return self._sections[section_name]
+
+    def __iter__(self):
+        return iter(self._sections)
+
+    def __len__(self):
+        return len(self._sections)
+
+    def close(self):
+        if hasattr(self._data, 'close'):
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
@@ -4,59 +4,217 @@ import sys
 
 import click
 
-from confirm.generator import generate_config_parser
-from confirm.generator import generate_documentation
-from confirm.generator import generate_schema_file
-from confirm.generator import append_existing_values
-from confirm.validator import validator_from_config_file
-from confirm.utils import load_config_file, load_schema_file
+# Only the modules needed to build the command line interface are imported
+# here. Each command imports what it uses, since the startup time is most of the
+# run time of a command validating a few small files. The choices of the options
+# are the keys of `confirm.reporters.REPORTERS` and `confirm.generator.DOCUMENTATION_WRITERS`.
+REPORTER_NAMES = ['json', 'jsonl', 'junit', 'sarif', 'text']
+DOCUMENTATION_FORMATS = ['html', 'markdown', 'rst']
+
+
+def _load_schema(schema_file):
+    return _resolve_schema(schema_file)[0]
+
+
+def _resolve_schema(schema_file):
+    """
+    :returns: Tuple of the schema and of the paths of the schema files it is read from.
+    """
+    from confirm.composition import SchemaResolver
+
+    schema_cache = click.get_current_context().find_root().obj['schema_cache']
+    if schema_cache is not None:
+        schema, dependencies = schema_cache.resolve(schema_file)
+    else:
+        schema, dependencies = SchemaResolver().resolve(schema_file)
+    return schema, list(dependencies)
+
+
+def _start_profiling(ctx, profile, profile_output):
+    if profile:
+        from confirm.instrumentation import Instrumentation, instrument
+
+        instrumentation_context = instrument(Instrumentation())
+        instrumentation = instrumentation_context.__enter__()
+
+        def print_summary():
+            instrumentation_context.__exit__(None, None, None)
+            click.echo(instrumentation.summary(), err=True, nl=False)
+
+        ctx.call_on_close(print_summary)
+
+    if profile_output:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def dump_stats():
+            profiler.disable()
+            profiler.dump_stats(profile_output)
+
+        ctx.call_on_close(dump_stats)
 
 
 @click.group()
-def cli():
+@click.option('--schema-cache', type=click.Path(file_okay=False), envvar='CONFIRM_SCHEMA_CACHE',
+              help='Directory where parsed schemas are cached between invocations.')
+@click.option('--profile', is_flag=True, default=False,
+              help='Prints the time spent in each phase to stderr. With --jobs, workers are not measured.')
+@click.option('--profile-output', type=click.Path(dir_okay=False, writable=True),
+              help='Dumps cProfile statistics to this file, readable with pstats.')
+@click.pass_context
+def cli(ctx, schema_cache, profile, profile_output):
     """Simple Python configuration file management."""
-    pass
+    if schema_cache:
+        from confirm.cache import SchemaCache
+        schema_cache = SchemaCache(schema_cache)
 
+    ctx.obj = {'schema_cache': schema_cache}
+    _start_profiling(ctx, profile, profile_output)
 
-@cli.command(short_help='Validate a configuration against a schema')
+
+@cli.command(short_help='Validate configurations against a schema')
 @click.argument('schema_file', type=click.Path(exists=True, readable=True, dir_okay=False))
-@click.argument('config_file', type=click.Path(exists=True, readable=True, dir_okay=False))
+@click.argument('config_files', nargs=-1, required=True)
 @click.option('--deprecation', '-d', is_flag=True, default=False, help='Handles deprecated options / sections as errors.')
-def validate(schema_file, config_file, deprecation):
-    '''Validate a configuration file against a confirm schema.'''
+@click.option('--jobs', '-j', type=click.IntRange(min=0), default=1, help='Number of worker processes, 0 for one per CPU.')
+@click.option('--format', '-f', 'output_format', type=click.Choice(REPORTER_NAMES), default='text',
+              help='Output format. The text output goes to stderr, the others to stdout.')
+@click.option('--fail-fast', '-x', is_flag=True, default=False, help='Stops validating a file at its first error.')
+@click.option('--max-errors', type=click.IntRange(min=1), default=None, help='Stops validating a file after this number of errors.')
+@click.option('--manifest', '-m', type=click.Path(dir_okay=False),
+              help='File storing the results, so that only the files which changed are validated again.')
+@click.option('--section-jobs', type=click.IntRange(min=0), default=1,
+              help='Number of worker processes validating the sections of a large file, 0 for one per CPU.')
+def validate(schema_file, config_files, deprecation, jobs, output_format, fail_fast, max_errors, manifest, section_jobs):
+    '''Validate configuration files against a confirm schema.
+
+    CONFIG_FILES can be configuration files, globs or directories.
+    '''
+    from confirm.batch import expand_config_paths, validate_config_files
+    from confirm.reporters import REPORTERS
+    from confirm.schema import CompiledSchema
+
+    schema, schema_file_paths = _resolve_schema(schema_file)
+    try:
+        schema = CompiledSchema(schema, is_flat=True)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='SCHEMA_FILE')
+
+    try:
+        # The schema files are not validated as configurations when they are in a walked directory.
+        config_file_paths = expand_config_paths(config_files, schema_file_paths)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='CONFIG_FILES')
+
+    if section_jobs != 1 and jobs != 1 and len(config_file_paths) > 1:
+        # Worker processes cannot start pools of their own.
+        raise click.UsageError('--section-jobs cannot be used with --jobs when validating many files.')
+
+    validate_options = {'error_on_deprecated': deprecation, 'fail_fast': fail_fast, 'max_errors': max_errors}
+
+    if manifest:
+        from confirm.cache import ValidationManifest
+        manifest = ValidationManifest(manifest, schema, validate_options)
 
-    result = validator_from_config_file(config_file, schema_file)
-    result.validate(error_on_deprecated=deprecation)
+    # The results do not depend on the number of section jobs, which is left out of the manifest key.
+    validate_options['section_jobs'] = section_jobs
 
-    for error in result.errors():
-        click.secho('Error   : %s' % error, err=True, fg='red')
+    show_file_names = len(config_file_paths) > 1
 
-    for warning in result.warnings():
-        click.secho('Warning : %s' % warning, err=True, fg='yellow')
+    stream = click.get_text_stream('stderr' if output_format == 'text' else 'stdout')
+    reporter = REPORTERS[output_format](stream, show_file_names)
+    reporter.start()
 
+    invalid_files_count = 0
+    results = validate_config_files(config_file_paths, schema, jobs, manifest, **validate_options)
+    for config_file_path, file_issues in results:
+        reporter.report_file(config_file_path, file_issues)
 
-@cli.command(short_help='Migrate a configuration using a schema')
+        if any(issue.is_error() for issue in file_issues):
+            invalid_files_count += 1
+
+    reporter.finish()
+
+    if manifest is not None:
+        manifest.save()
+
+    if show_file_names:
+        click.echo('%d configuration file(s) validated, %d invalid.' % (len(config_file_paths), invalid_files_count), err=True)
+
+    if invalid_files_count:
+        sys.exit(1)
+
+
+@cli.command(short_help='Migrate configurations using a schema')
 @click.argument('schema_file', type=click.Path(exists=True, readable=True, dir_okay=False))
-@click.argument('config_file', type=click.Path(exists=True, readable=True, dir_okay=False))
-def migrate(schema_file, config_file):
-    '''Migrates a configuration file using a confirm schema.'''
+@click.argument('config_files', nargs=-1, required=True)
+@click.option('--in-place', '-i', is_flag=True, default=False, help='Rewrites the configuration files which changed.')
+@click.option('--jobs', '-j', type=click.IntRange(min=0), default=1, help='Number of worker processes, 0 for one per CPU.')
+def migrate(schema_file, config_files, in_place, jobs):
+    '''Migrates configuration files using a confirm schema.
+
+    CONFIG_FILES can be configuration files, globs or directories. Unless
+    --in-place is used, a single configuration file is migrated to stdout.
+    Configurations are migrated to the .INI format, so only .INI files are
+    migrated in place.
+    '''
+    from confirm.batch import expand_config_paths, migrate_config_files
 
-    schema = load_schema_file(open(schema_file, 'r'))
-    config = load_config_file(config_file, open(config_file, 'r').read())
+    schema, schema_file_paths = _resolve_schema(schema_file)
 
-    config = append_existing_values(schema, config)
+    try:
+        config_file_paths = expand_config_paths(config_files, schema_file_paths)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='CONFIG_FILES')
 
-    migrated_config = generate_config_parser(config)
-    migrated_config.write(sys.stdout)
+    if len(config_file_paths) > 1 and not in_place:
+        raise click.UsageError('Migrating many configuration files requires --in-place.')
 
+    changed_files_count = 0
+    skipped_files_count = 0
+    failed_files_count = 0
+    results = migrate_config_files(config_file_paths, schema, jobs, in_place)
+    for config_file_path, migrated_config, changed, skipped, error in results:
 
-@cli.command(short_help='Create reST doc from schema')
+        if error is not None:
+            click.secho('Error   : %s : %s' % (config_file_path, error), err=True, fg='red')
+            failed_files_count += 1
+            continue
+
+        if skipped:
+            click.echo('Skipped  : %s (only .INI files are migrated in place)' % config_file_path, err=True)
+            skipped_files_count += 1
+            continue
+
+        if not in_place:
+            sys.stdout.write(migrated_config)
+        elif changed:
+            click.echo('Migrated : %s' % config_file_path, err=True)
+
+        if changed:
+            changed_files_count += 1
+
+    if in_place:
+        click.echo('%d configuration file(s) migrated, %d changed, %d skipped, %d failed.' % (
+            len(config_file_paths) - skipped_files_count, changed_files_count, skipped_files_count, failed_files_count
+        ), err=True)
+
+    if failed_files_count:
+        sys.exit(1)
+
+
+@cli.command(short_help='Create documentation from schema')
 @click.argument('schema_file', type=click.Path(exists=True, readable=True, dir_okay=False))
-def document(schema_file):
-    '''Generate reStructuredText documentation from a confirm schema.'''
-    schema = load_schema_file(open(schema_file, 'r'))
-    documentation = generate_documentation(schema)
-    sys.stdout.write(documentation)
+@click.option('--format', '-f', 'documentation_format', type=click.Choice(DOCUMENTATION_FORMATS), default='rst',
+              help='Format of the documentation.')
+def document(schema_file, documentation_format):
+    '''Generate documentation from a confirm schema.'''
+    from confirm.generator import write_documentation
+
+    schema = _load_schema(schema_file)
+    write_documentation(schema, sys.stdout, documentation_format)
 
 
 @cli.command(short_help='Create conf template from schema')
@@ -64,14 +222,95 @@ def document(schema_file):
 @click.option('--all-options', '-a', is_flag=True, default=False, help='Include all options from the schema.')
 def generate(schema_file, all_options):
     '''Generates a template configuration file from a confirm schema.'''
-    schema = load_schema_file(open(schema_file, 'r'))
-    config_parser = generate_config_parser(schema, include_all=all_options)
-    config_parser.write(sys.stdout)
+    from confirm.generator import write_config
+
+    schema = _load_schema(schema_file)
+    write_config(schema, sys.stdout, include_all=all_options)
+
+
+@cli.command(short_help='Initialize schema from existing confs')
+@click.argument('config_files', nargs=-1, required=True)
+@click.option('--jobs', '-j', type=click.IntRange(min=0), default=1, help='Number of worker processes, 0 for one per CPU.')
+@click.option('--required-ratio', '-r', type=click.FloatRange(0, 1), default=1.0,
+              help='Minimal fraction of the configuration files defining an option for it to be required.')
+def init(config_files, jobs, required_ratio):
+    '''Initialize a confirm schema from existing configuration files.
+
+    CONFIG_FILES can be configuration files, globs or directories. The types of
+    the options are inferred from their values.
+    '''
+    from confirm.batch import expand_config_paths, infer_schema_from_files
+    from confirm.utils import dump_schema_file
+
+    try:
+        config_file_paths = expand_config_paths(config_files)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='CONFIG_FILES')
+
+    schema, errors = infer_schema_from_files(config_file_paths, jobs, required_ratio)
+    for config_file_path, error in errors:
+        click.secho('Error   : %s : %s' % (config_file_path, error), err=True, fg='red')
+
+    sys.stdout.write(dump_schema_file(schema))
+
+    if errors:
+        sys.exit(1)
+
+
+@cli.command(short_help='Serve validations on a Unix socket')
+@click.argument('socket_path', type=click.Path(dir_okay=False))
+def serve(socket_path):
+    '''Serve validation requests on a Unix socket, keeping the schemas in memory.'''
+    import signal
+    from confirm.server import serve as serve_validations
+
+    click.echo('Serving validations on %s.' % socket_path, err=True)
+
+    # Makes sure that the socket is removed when the server is terminated.
+    signal.signal(signal.SIGTERM, lambda signal_number, frame: sys.exit(0))
+    try:
+        serve_validations(socket_path)
+    except KeyboardInterrupt:
+        pass
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='SOCKET_PATH')
+
+
+@cli.command(short_help='Validate configurations using a server')
+@click.argument('socket_path', type=click.Path(exists=True, dir_okay=False))
+@click.argument('schema_file', type=click.Path(exists=True, readable=True, dir_okay=False))
+@click.argument('config_files', nargs=-1, required=True, type=click.Path(exists=True, readable=True, dir_okay=False))
+@click.option('--deprecation', '-d', is_flag=True, default=False, help='Handles deprecated options / sections as errors.')
+def client(socket_path, schema_file, config_files, deprecation):
+    '''Validate configuration files using a confirm server.'''
+    from confirm.reporters import REPORTERS
+    from confirm.server import ValidationClient
+
+    validation_client = ValidationClient(socket_path)
+    reporter = REPORTERS['text'](click.get_text_stream('stderr'), len(config_files) > 1)
+    reporter.start()
+
+    invalid_files_count = 0
+    try:
+        for config_file_path in config_files:
+            with open(config_file_path, 'r') as config_file:
+                config = config_file.read()
+
+            valid, file_issues = validation_client.validate(
+                schema_file, config, config_file_path, error_on_deprecated=deprecation
+            )
+            reporter.report_file(config_file_path, file_issues)
+
+            if not valid:
+                invalid_files_count += 1
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    finally:
+        reporter.finish()
+        validation_client.close()
 
+    if len(config_files) > 1:
+        click.echo('%d configuration file(s) validated, %d invalid.' % (len(config_files), invalid_files_count), err=True)
 
-@cli.command(short_help='Initialize schema from existing conf')
-@click.argument('config_file', type=click.Path(exists=True, readable=True, dir_okay=False))
-def init(config_file):
-    '''Initialize a confirm schema from an existing configuration file.'''
-    schema = generate_schema_file(open(config_file, 'r').read())
-    sys.stdout.write(schema)
+    if invalid_files_count:
+        sys.exit(1)
@@ -0,0 +1,228 @@
+"""
+Reporting of the issues found while validating configuration files.
+
+Reporters write their output through a buffer, flushed whenever it holds more
+than `BUFFER_SIZE` characters, so that reporting the issues of many files takes
+few writes and keeps a bounded memory usage.
+"""
+import json
+import os
+import re
+
+import click
+
+from confirm import issues
+
+
+BUFFER_SIZE = 64 * 1024
+
+SARIF_VERSION = '2.1.0'
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+# Characters which are not allowed in XML 1.0 documents, even escaped.
+_INVALID_XML_CHARACTERS = re.compile(u'[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def issue_to_record(config_file_path, issue):
+    record = issue.to_dict()
+    record['file'] = config_file_path
+    return record
+
+
+def _dump_record(record):
+    # Values of YAML configurations are not always JSON serializable.
+    return json.dumps(record, sort_keys=True, default=str)
+
+
+def _xml_escape(text):
+    text = _INVALID_XML_CHARACTERS.sub(u'\ufffd', text)
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+
+def _text_lines(prefix, file_issues):
+    """
+    Lines of the text report of a file, errors first.
+    """
+    lines = ['Error   : %s%s' % (prefix, issue.message) for issue in file_issues if issue.is_error()]
+    lines.extend('Warning : %s%s' % (prefix, issue.message) for issue in file_issues if not issue.is_error())
+    return lines
+
+
+class Reporter(object):
+    """
+    Base class of the reporters, which receive the issues of each configuration file as soon as it is validated.
+
+    :param stream: File object where the report is written.
+    :param show_file_names: Whether the report is about many configuration files.
+    :param buffer_size: Number of characters buffered before they are written to the stream.
+    """
+
+    def __init__(self, stream, show_file_names=True, buffer_size=BUFFER_SIZE):
+        self.stream = stream
+        self.show_file_names = show_file_names
+        self.buffer_size = buffer_size
+        self._chunks = []
+        self._buffered_size = 0
+
+    def write(self, text):
+        self._chunks.append(text)
+        self._buffered_size += len(text)
+        if self._buffered_size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._chunks:
+            self._write_to_stream(''.join(self._chunks))
+            self._chunks = []
+            self._buffered_size = 0
+
+    def _write_to_stream(self, text):
+        self.stream.write(text)
+
+    def start(self):
+        pass
+
+    def report_file(self, config_file_path, file_issues):
+        raise NotImplementedError()
+
+    def finish(self):
+        self.flush()
+
+
+class TextReporter(Reporter):
+    """
+    Colored human-readable report, errors first.
+
+    The report is flushed after every file when the stream is a terminal.
+    """
+
+    def __init__(self, stream, show_file_names=True, buffer_size=BUFFER_SIZE):
+        Reporter.__init__(self, stream, show_file_names, buffer_size)
+        self._is_interactive = hasattr(stream, 'isatty') and stream.isatty()
+
+    def report_file(self, config_file_path, file_issues):
+        prefix = '%s : ' % config_file_path if self.show_file_names else ''
+
+        for line in _text_lines(prefix, file_issues):
+            self.write(click.style(line, fg='red' if line.startswith('Error') else 'yellow') + '\n')
+
+        if self._is_interactive:
+            self.flush()
+
+    def _write_to_stream(self, text):
+        # Strips the colors when the stream is not a terminal, like `click.secho`.
+        click.echo(text, file=self.stream, nl=False)
+
+
+class JsonLinesReporter(Reporter):
+    """
+    One JSON object per issue and per line.
+    """
+
+    def report_file(self, config_file_path, file_issues):
+        for issue in file_issues:
+            self.write(_dump_record(issue_to_record(config_file_path, issue)) + '\n')
+
+
+class JsonReporter(Reporter):
+    """
+    JSON array of the issues, written as the issues are reported.
+    """
+
+    def start(self):
+        self._first_record = True
+        self.write('[')
+
+    def report_file(self, config_file_path, file_issues):
+        for issue in file_issues:
+            self.write(('\n' if self._first_record else ',\n') + _dump_record(issue_to_record(config_file_path, issue)))
+            self._first_record = False
+
+    def finish(self):
+        self.write('\n]\n')
+        Reporter.finish(self)
+
+
+class JUnitReporter(Reporter):
+    """
+    JUnit XML report, with a test suite of a single test case per file.
+
+    A file with errors has a failure listing them, and its warnings are written
+    to the standard output of its test case. Each test suite holds its own
+    counts, so that the report is written as the files are validated.
+    """
+
+    def start(self):
+        self.write('<?xml version="1.0"?>\n<testsuites name="confirm">\n')
+
+    def report_file(self, config_file_path, file_issues):
+        name = _xml_escape(config_file_path)
+        errors = _text_lines('', [issue for issue in file_issues if issue.is_error()])
+        warnings = _text_lines('', [issue for issue in file_issues if not issue.is_error()])
+
+        self.write('  <testsuite name="%s" tests="1" failures="%d" errors="0">\n' % (name, 1 if errors else 0))
+        self.write('    <testcase classname="confirm" name="%s">\n' % name)
+        if errors:
+            self.write('      <failure type="invalid-configuration" message="%d error(s)">%s</failure>\n' % (
+                len(errors), _xml_escape('\n'.join(errors))
+            ))
+        if warnings:
+            self.write('      <system-out>%s</system-out>\n' % _xml_escape('\n'.join(warnings)))
+        self.write('    </testcase>\n  </testsuite>\n')
+
+    def finish(self):
+        self.write('</testsuites>\n')
+        Reporter.finish(self)
+
+
+def _issue_to_sarif_result(config_file_path, issue):
+    location = {'physicalLocation': {'artifactLocation': {'uri': config_file_path.replace(os.sep, '/')}}}
+    if issue.section is not None:
+        name = issue.section if issue.option is None else '%s.%s' % (issue.section, issue.option)
+        location['logicalLocations'] = [{'fullyQualifiedName': name, 'kind': 'member'}]
+
+    return {
+        'ruleId': issue.code,
+        'level': 'error' if issue.is_error() else 'warning',
+        'message': {'text': issue.message},
+        'locations': [location],
+    }
+
+
+class SarifReporter(Reporter):
+    """
+    SARIF log of a single run, whose results are written as the issues are reported.
+    """
+
+    def start(self):
+        log = {
+            'version': SARIF_VERSION,
+            '$schema': SARIF_SCHEMA,
+            'runs': [{
+                'tool': {'driver': {'name': 'confirm', 'rules': [{'id': code} for code in sorted(issues.MESSAGES)]}},
+                'results': [],
+            }],
+        }
+
+        # The results are written between the two halves of the log.
+        self._log_start, self._log_end = _dump_record(log).split('"results": []')
+        self._first_result = True
+        self.write(self._log_start + '"results": [')
+
+    def report_file(self, config_file_path, file_issues):
+        for issue in file_issues:
+            self.write(('\n' if self._first_result else ',\n') + _dump_record(_issue_to_sarif_result(config_file_path, issue)))
+            self._first_result = False
+
+    def finish(self):
+        self.write('\n]' + self._log_end + '\n')
+        Reporter.finish(self)
+
+
+REPORTERS = {
+    'text': TextReporter,
+    'json': JsonReporter,
+    'jsonl': JsonLinesReporter,
+    'junit': JUnitReporter,
+    'sarif': SarifReporter,
+}
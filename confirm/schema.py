@@ -0,0 +1,335 @@
+"""
+Compiled representation of a confirm schema.
+
+Analysing a schema (which sections hold required options, which ones are
+entirely deprecated, how each option is type checked...) only has to be done
+once, no matter how many configurations are validated against it.
+"""
+import re
+
+from confirm.instrumentation import measure
+
+
+VALID_TYPES = ('int', 'float', 'bool', 'list', 'str')
+
+
+BOOLEAN_VALUES = {'true': True, 'false': False, '1': True, '0': False}
+LIST_SEPARATOR = ','
+
+
+def _coerce_int(value):
+    # Booleans and floats with a fractional part would be silently truncated.
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError()
+    return int(value)
+
+
+def _coerce_float(value):
+    return float(value)
+
+
+def _coerce_bool(value):
+    if isinstance(value, bool):
+        return value
+    try:
+        return BOOLEAN_VALUES[str(value).lower()]
+    except KeyError:
+        raise ValueError()
+
+
+def _coerce_list(value):
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if isinstance(value, dict) or not hasattr(value, 'split'):
+        raise ValueError()
+    return [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+
+
+def _coerce_str(value):
+    if isinstance(value, (list, tuple, dict)):
+        raise ValueError()
+    return value if hasattr(value, 'split') else str(value)
+
+
+# Functions converting a configuration value to its type, raising ValueError for invalid values.
+TYPE_COERCERS = {
+    'int': _coerce_int,
+    'float': _coerce_float,
+    'bool': _coerce_bool,
+    'list': _coerce_list,
+    'str': _coerce_str,
+}
+
+
+# Keys of the option schema constraining the values, besides their type.
+CONSTRAINT_KEYS = ('choices', 'min', 'max', 'pattern', 'min_length', 'max_length')
+CONSTRAINT_KEYS_SET = frozenset(CONSTRAINT_KEYS)
+NUMERIC_TYPES = ('int', 'float')
+
+
+def _compares_typed_choices(option_type):
+    # Values of options without a type, and items of lists, are compared as strings.
+    return option_type in TYPE_COERCERS and option_type != 'list'
+
+
+def _compile_choices(option_type, choices):
+    if not isinstance(choices, (list, tuple)):
+        raise ValueError("choices must be a list")
+
+    if not _compares_typed_choices(option_type):
+        return frozenset(str(choice) for choice in choices)
+
+    coerce = TYPE_COERCERS[option_type]
+    try:
+        return frozenset(coerce(choice) for choice in choices)
+    except (TypeError, ValueError):
+        raise ValueError("choices must be of type %s" % option_type)
+
+
+def _compile_bound(option_schema, key, convert):
+    bound = option_schema.get(key)
+    if bound is None:
+        return None
+    if isinstance(bound, (int, float)) and not isinstance(bound, bool):
+        return bound
+    try:
+        return convert(bound)
+    except (TypeError, ValueError):
+        raise ValueError("%s must be a number" % key)
+
+
+class CompiledConstraints(object):
+    """
+    Constraints of the values of an option, besides their type.
+
+    Regular expressions are compiled and choices are frozen when the schema is
+    compiled. Like the other schema errors, an invalid constraint is rejected
+    then, instead of being reported for every validated value.
+
+    :raises ValueError: If a constraint is invalid.
+    """
+
+    __slots__ = (
+        'choices', 'compares_typed_choices', 'choices_description',
+        'minimum', 'maximum', 'pattern', 'min_length', 'max_length',
+    )
+
+    def __init__(self, option_type, option_schema):
+        self.choices = self.choices_description = None
+        self.compares_typed_choices = _compares_typed_choices(option_type)
+        self.minimum = self.maximum = self.pattern = self.min_length = self.max_length = None
+        try:
+            self._compile(option_type, option_schema)
+        except (TypeError, ValueError, re.error) as e:
+            raise ValueError(str(e))
+
+    def _compile(self, option_type, option_schema):
+        if option_schema.get('choices') is not None:
+            self.choices = _compile_choices(option_type, option_schema['choices'])
+            try:
+                sorted_choices = sorted(self.choices)
+            except TypeError:
+                sorted_choices = sorted(self.choices, key=str)
+            self.choices_description = ', '.join(str(choice) for choice in sorted_choices)
+
+        self.minimum = _compile_bound(option_schema, 'min', _coerce_float)
+        self.maximum = _compile_bound(option_schema, 'max', _coerce_float)
+        if (self.minimum is not None or self.maximum is not None) and option_type not in NUMERIC_TYPES:
+            raise ValueError("min and max require the int or float type")
+
+        if option_schema.get('pattern') is not None:
+            self.pattern = re.compile(option_schema['pattern'])
+
+        self.min_length = _compile_bound(option_schema, 'min_length', _coerce_int)
+        self.max_length = _compile_bound(option_schema, 'max_length', _coerce_int)
+
+
+class CompiledOption(object):
+    """
+    Option whose type checking function and value constraints are resolved once.
+
+    `constraints` is None for the options without constraints, which are most
+    of them, so that compiling them stays cheap.
+    """
+
+    __slots__ = ('name', 'schema', 'type', 'type_is_valid', 'coerce', 'required', 'deprecated', 'constraints')
+
+    def __init__(self, name, option_schema):
+        self.name = name
+        self.schema = option_schema
+        self.type = option_schema.get('type')
+        self.type_is_valid = self.type in VALID_TYPES
+        self.coerce = TYPE_COERCERS.get(self.type)
+        self.required = bool(option_schema.get('required'))
+        self.deprecated = bool(option_schema.get('deprecated'))
+
+        self.constraints = None
+        if not CONSTRAINT_KEYS_SET.isdisjoint(option_schema) and any(option_schema.get(key) is not None for key in CONSTRAINT_KEYS):
+            try:
+                self.constraints = CompiledConstraints(self.type, option_schema)
+            except ValueError as e:
+                raise ValueError("Invalid constraint for option %s : %s." % (name, e))
+
+
+class CompiledSection(object):
+
+    __slots__ = ('name', 'options', 'option_names', 'deprecated_option_names', 'has_required_option', 'is_deprecated')
+
+    def __init__(self, name, section_schema):
+        self.name = name
+
+        # Options with an empty definition are considered as not defined in the schema.
+        self.options = dict(
+            (option_name, CompiledOption(option_name, option_schema))
+            for option_name, option_schema in section_schema.items() if option_schema
+        )
+        self.option_names = frozenset(self.options)
+        self.deprecated_option_names = frozenset(option.name for option in self.options.values() if option.deprecated)
+
+        self.has_required_option = any(option.required for option in self.options.values())
+        # Options with an empty definition are not deprecated.
+        self.is_deprecated = len(self.options) == len(section_schema) and len(self.deprecated_option_names) == len(self.options)
+
+
+# Separator of the names in the dotted path of a nested section.
+PATH_SEPARATOR = '.'
+
+
+def _is_nested_section(definition):
+    # Option definitions only hold scalars and lists, nested sections only hold option definitions.
+    return isinstance(definition, dict) and bool(definition) and all(isinstance(value, dict) for value in definition.values())
+
+
+def _has_nested_sections(schema):
+    # Single cheap pass: a nested section starts with an option definition, while
+    # an option definition starts with a scalar. Only candidates are fully checked.
+    for section_schema in schema.values():
+        if not isinstance(section_schema, dict):
+            continue
+        for definition in section_schema.values():
+            if definition and isinstance(definition, dict):
+                for value in definition.values():
+                    if isinstance(value, dict) and _is_nested_section(definition):
+                        return True
+                    break
+    return False
+
+
+def flatten_schema(schema):
+    """
+    Returns the schema with its nested sections defined at the top level, by dotted path.
+
+        server:                          server:
+          name: {required: true}           name: {required: true}
+          http:                 ->       server.http:
+            port: {type: int}              port: {type: int}
+
+    Sections defined both nested and by dotted path are merged. The schema is
+    returned as is when it has no nested sections.
+    """
+    if not _has_nested_sections(schema):
+        return schema
+
+    flat_schema = {}
+    stack = list(schema.items())
+    stack.reverse()
+    while stack:
+        section_name, section_schema = stack.pop()
+        if not isinstance(section_schema, dict):
+            flat_schema[section_name] = section_schema
+            continue
+
+        section_options = {}
+        nested_sections = []
+        for name, definition in section_schema.items():
+            if _is_nested_section(definition):
+                nested_sections.append((section_name + PATH_SEPARATOR + name, definition))
+            else:
+                section_options[name] = definition
+
+        # Sections only holding nested sections are mere containers.
+        if section_options or not nested_sections:
+            existing_options = flat_schema.get(section_name)
+            if isinstance(existing_options, dict):
+                existing_options.update(section_options)
+            else:
+                flat_schema[section_name] = section_options
+
+        nested_sections.reverse()
+        stack.extend(nested_sections)
+
+    return flat_schema
+
+
+class SchemaPathNode(object):
+    """
+    Node of the path trie of a schema, whose edges are the names in the dotted
+    paths of the sections.
+    """
+
+    __slots__ = ('section', 'children')
+
+    def __init__(self):
+        # `CompiledSection` whose path ends at this node, if any.
+        self.section = None
+        self.children = {}
+
+    def get(self, name):
+        """
+        Returns the child node of a name, which can itself be a dotted path, or None.
+        """
+        if PATH_SEPARATOR not in name:
+            return self.children.get(name)
+
+        node = self
+        for path_name in name.split(PATH_SEPARATOR):
+            node = node.children.get(path_name)
+            if node is None:
+                return None
+        return node
+
+
+class CompiledSchema(object):
+    """
+    Schema whose section and option metadata is computed once.
+
+    Nested sections are flattened (see `flatten_schema`), and the path trie of
+    the sections tells the sections nested in a configuration from its options.
+
+    :param schema: Dictionary representing the confirm schema, as returned by `load_schema_file`.
+    :param is_flat: Whether the nested sections of the schema are already
+        flattened, like in the schemas returned by `load_schema`.
+    """
+
+    def __init__(self, schema, is_flat=False):
+        self.schema = schema = schema if is_flat else flatten_schema(schema)
+
+        # Sections with an empty definition are considered as not defined in the schema.
+        with measure('compile_schema'):
+            self.sections = dict(
+                (section_name, CompiledSection(section_name, section_schema))
+                for section_name, section_schema in schema.items() if section_schema
+            )
+        self.section_names = frozenset(self.sections)
+
+        self.path_trie = SchemaPathNode()
+        for section_name, section in self.sections.items():
+            node = self.path_trie
+            for path_name in section_name.split(PATH_SEPARATOR):
+                child = node.children.get(path_name)
+                if child is None:
+                    child = node.children[path_name] = SchemaPathNode()
+                node = child
+            node.section = section
+
+    def get_section(self, section_name):
+        return self.sections.get(section_name)
+
+
+def compile_schema(schema):
+    """
+    Returns a `CompiledSchema`, compiling the schema dictionary if needed.
+    """
+    if isinstance(schema, CompiledSchema):
+        return schema
+    return CompiledSchema(schema)
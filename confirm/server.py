@@ -0,0 +1,199 @@
+"""
+Validation server keeping the parsed schemas in memory.
+
+The server listens on a Unix domain socket. Each request and each response is
+a JSON object on its own line, and a connection can be reused for many requests.
+
+Request fields:
+
+* ``schema``: Absolute path of the schema file, on the server host.
+* ``config``: Content of the configuration file.
+* ``config_path``: Path of the configuration file, used to infer its format.
+* ``options``: Optional keyword arguments of `Validation.validate`.
+
+Response fields are ``valid`` and ``issues``, or ``error`` if the request failed.
+A configuration which cannot be loaded is reported as an ``unloadable-config``
+issue, while requests fail on protocol and schema errors.
+"""
+import json
+import os
+import socket
+import stat
+import threading
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+from confirm import issues
+from confirm.composition import SchemaResolver
+from confirm.issues import Issue
+from confirm.schema import CompiledSchema
+from confirm.utils import check_config_structure
+from confirm.utils import load_config_file
+from confirm.validator import Validation
+
+
+VALIDATE_OPTIONS = ('error_on_deprecated', 'fail_fast', 'max_errors')
+
+
+def _get_file_stat(file_path):
+    file_stat = os.stat(file_path)
+    return (file_stat.st_mtime, file_stat.st_size)
+
+
+def _dependencies_changed(dependencies):
+    try:
+        return any(_get_file_stat(path) != file_stat for path, (file_stat, _) in dependencies.items())
+    except OSError:
+        return True
+
+
+class SchemaStore(object):
+    """
+    Compiled schemas, reloaded when their schema file or the files it includes change.
+    """
+
+    def __init__(self):
+        self._schemas = {}
+        self._resolver = SchemaResolver()
+        self._lock = threading.Lock()
+
+    def get(self, schema_file_path):
+        entry = self._schemas.get(schema_file_path)
+        if entry is not None and not _dependencies_changed(entry[0]):
+            return entry[1]
+
+        with self._lock:
+            entry = self._schemas.get(schema_file_path)
+            if entry is None or _dependencies_changed(entry[0]):
+                schema, dependencies = self._resolver.resolve(schema_file_path)
+                entry = (dependencies, CompiledSchema(schema, is_flat=True))
+                self._schemas[schema_file_path] = entry
+
+                # The files which changed are parsed again, their previous versions are no longer needed.
+                self._resolver.retain(
+                    content_hash for schema_dependencies, _ in self._schemas.values() for _, content_hash in schema_dependencies.values()
+                )
+
+        return entry[1]
+
+
+def handle_request(schema_store, request):
+    """
+    Validates the configuration of a request.
+
+    :returns: Dictionary of the response.
+    """
+    schema_file_path = request['schema']
+    if not os.path.isabs(schema_file_path):
+        raise ValueError("The schema path must be absolute.")
+
+    schema = schema_store.get(schema_file_path)
+
+    try:
+        config = load_config_file(request.get('config_path', ''), request['config'])
+        check_config_structure(config)
+    except Exception as e:
+        # Like `validate_config_file`, configurations which cannot be loaded are invalid, not failed requests.
+        return {'valid': False, 'issues': [Issue(issues.UNLOADABLE_CONFIG, issues.ERROR, value=str(e)).to_dict()]}
+
+    options = request.get('options') or {}
+    validation = Validation(config, schema)
+    validation.validate(**dict((key, options[key]) for key in VALIDATE_OPTIONS if key in options))
+
+    return {
+        'valid': validation.is_valid(),
+        'issues': [issue.to_dict() for issue in validation.issues()],
+    }
+
+
+class ValidationRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+
+            try:
+                response = handle_request(self.server.schema_store, json.loads(line.decode('utf-8')))
+            except Exception as e:
+                response = {'error': '%s: %s' % (type(e).__name__, e)}
+
+            self.wfile.write((json.dumps(response, default=str) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class ValidationServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server handling each connection in its own thread.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path):
+        self.schema_store = SchemaStore()
+        socketserver.UnixStreamServer.__init__(self, socket_path, ValidationRequestHandler)
+
+
+def serve(socket_path):
+    """
+    Serves validation requests on a Unix socket until interrupted.
+
+    :raises ValueError: If something other than a socket exists at `socket_path`.
+    """
+    try:
+        socket_mode = os.stat(socket_path).st_mode
+    except OSError:
+        socket_mode = None
+
+    if socket_mode is not None:
+        # Only a socket left by a previous server is removed.
+        if not stat.S_ISSOCK(socket_mode):
+            raise ValueError("%s exists and is not a socket." % socket_path)
+        os.remove(socket_path)
+
+    server = ValidationServer(socket_path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+
+
+class ValidationClient(object):
+    """
+    Client of a validation server, reusing its connection for every request.
+    """
+
+    def __init__(self, socket_path):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(socket_path)
+        self._file = self._socket.makefile('rwb')
+
+    def validate(self, schema_file_path, config, config_path='', **validate_options):
+        """
+        Validates a configuration on the server.
+
+        :param config: Content of the configuration file.
+        :returns: Tuple of whether the configuration is valid and of the list of `Issue` found.
+        :raises RuntimeError: If the request or the schema is invalid.
+        """
+        request = {
+            'schema': os.path.abspath(schema_file_path),
+            'config': config,
+            'config_path': config_path,
+            'options': validate_options,
+        }
+        self._file.write((json.dumps(request) + '\n').encode('utf-8'))
+        self._file.flush()
+
+        response = json.loads(self._file.readline().decode('utf-8'))
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+
+        return response['valid'], [Issue(**issue) for issue in response['issues']]
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
@@ -1,18 +1,43 @@
-from difflib import get_close_matches
+from collections import Counter
 try:
-    from ConfigParser import RawConfigParser
+    from collections.abc import Mapping
 except ImportError:
-    from configparser import ConfigParser
+    from collections import Mapping
+import os
+import re
 try:
     from StringIO import StringIO
 except ImportError:
     from io import StringIO
 
-import yaml
+from confirm import instrumentation
 
 
 DEFAULT_TYPO_RATIO = 0.7
+YAML_FILE_EXTENSIONS = [".yaml", ".yml"]
 INI_FILE_EXTENSIONS = [".conf", ".ini"]
+JSON_FILE_EXTENSIONS = [".json"]
+TOML_FILE_EXTENSIONS = [".toml"]
+ENV_FILE_EXTENSIONS = [".env"]
+ENV_LINE_REGEX = re.compile(r"^(?:export\s+)?(?P<key>[A-Za-z_][A-Za-z0-9_]*)\s*=(?P<value>.*)$")
+ENV_SECTION_SEPARATOR = '__'
+ENV_DEFAULT_SECTION = 'env'
+
+# Format name -> loader, and file extension -> format name.
+CONFIG_LOADERS = {}
+CONFIG_FILE_EXTENSIONS = {}
+
+# Only the beginning of a configuration file is used to guess its format.
+SNIFF_SIZE = 4096
+INI_COMMENT_PREFIXES = ('#', ';')
+INI_DEFAULT_SECTION = 'DEFAULT'
+INI_SECTION_REGEX = re.compile(r"\[(?P<header>.+)\]")
+INI_OPTION_REGEX = re.compile(r"(?P<option>.*?)\s*[=:]\s*(?P<value>.*)$")
+# Dotted table headers and quoted string values are specific to TOML.
+TOML_TABLE_REGEX = re.compile(r"^\[\s*[A-Za-z0-9_-]+(?:\s*\.\s*[A-Za-z0-9_-]+)+\s*\]$")
+TOML_STRING_LINE_REGEX = re.compile(r"^[A-Za-z0-9_-]+\s+=\s+[\"']")
+# Characters which can follow the [ of a JSON array, but not of a .INI section header.
+JSON_ARRAY_ITEM_STARTS = '{["-0123456789]'
 
 
 def config_parser_to_dict(config_parser):
@@ -28,56 +53,412 @@ def config_parser_to_dict(config_parser):
     return response
 
 
+def _calculate_ratio(matches, length):
+    # Same computation as difflib, so that the ratios compare exactly.
+    if length:
+        return 2.0 * matches / length
+    return 1.0
+
+
+class TypoIndex(object):
+    """
+    Index of names used to find the most probable typo of a name.
+
+    The best match is the same as the one of `difflib.get_close_matches` with
+    `n=1`, but the candidates are pruned using their length and character counts,
+    and are compared in decreasing order of their best possible ratio, so that
+    the expensive `SequenceMatcher.ratio` is only computed for a few of them.
+
+    :param names: Names that can be returned as typos.
+    :param cutoff: Minimum similarity ratio of a typo.
+    """
+
+    def __init__(self, names, cutoff=DEFAULT_TYPO_RATIO):
+        self._cutoff = cutoff
+        self._lengths = {}
+
+        # The nth occurrence of a character in a name is indexed under (character, n),
+        # so that counting the postings of a query gives the size of the character
+        # multiset intersection used by SequenceMatcher.quick_ratio.
+        self._postings = {}
+
+        for name in set(names):
+            self._lengths[name] = len(name)
+            for char, count in Counter(name).items():
+                for occurrence in range(1, count + 1):
+                    self._postings.setdefault((char, occurrence), []).append(name)
+
+    def get_most_probable_typo(self, name):
+        name_length = len(name)
+
+        # Only an empty name can match an empty name.
+        if not name_length:
+            return name if name in self._lengths else None
+
+        matches_counts = Counter()
+        for char, count in Counter(name).items():
+            for occurrence in range(1, count + 1):
+                postings = self._postings.get((char, occurrence))
+                if postings is None:
+                    break
+                matches_counts.update(postings)
+
+        candidates = []
+        for candidate, matches in matches_counts.items():
+            length = self._lengths[candidate]
+
+            # Equivalent to SequenceMatcher.real_quick_ratio.
+            if _calculate_ratio(min(length, name_length), length + name_length) < self._cutoff:
+                continue
+
+            # Equivalent to SequenceMatcher.quick_ratio.
+            upper_bound = _calculate_ratio(matches, length + name_length)
+            if upper_bound >= self._cutoff:
+                candidates.append((upper_bound, candidate))
+
+        # Like difflib, ties on the ratio are broken by keeping the greatest name.
+        candidates.sort(reverse=True)
+
+        # difflib is imported on first use, like the other modules which commands may not need.
+        from difflib import SequenceMatcher
+
+        best_match = None
+        sequence_matcher = SequenceMatcher()
+        sequence_matcher.set_seq2(name)
+        for upper_bound, candidate in candidates:
+
+            if best_match is not None and upper_bound < best_match[0]:
+                break
+
+            sequence_matcher.set_seq1(candidate)
+            ratio = sequence_matcher.ratio()
+            if ratio >= self._cutoff and (best_match is None or (ratio, candidate) > best_match):
+                best_match = (ratio, candidate)
+
+        if best_match is not None:
+            return best_match[1]
+
+
 def get_most_probable_typo(schema_name, actual_options):
-    matches = get_close_matches(schema_name, actual_options, n=1, cutoff=DEFAULT_TYPO_RATIO)
+    return TypoIndex(actual_options).get_most_probable_typo(schema_name)
+
+
+def register_config_loader(format_name, loader, extensions=()):
+    """
+    Registers a configuration loader, replacing any loader of the same format.
+
+    :param format_name: Name of the configuration format, as returned by `sniff_config_format`.
+    :param loader: Function taking the content of a configuration file and returning its dictionary representation.
+    :param extensions: File extensions of the format.
+    """
+    CONFIG_LOADERS[format_name] = loader
+    for extension in extensions:
+        CONFIG_FILE_EXTENSIONS[extension.lower()] = format_name
 
-    if matches:
-        return matches[0]
+
+def get_config_file_extensions():
+    return sorted(CONFIG_FILE_EXTENSIONS)
+
+
+def sniff_config_format(config_file):
+    """
+    Guesses the format of a configuration file from its first significant line.
+
+    :returns: Name of the configuration format.
+    """
+    for line in config_file[:SNIFF_SIZE].splitlines():
+        line = line.strip()
+
+        if not line or line.startswith('#'):
+            continue
+
+        if line.startswith('{') or (line.startswith('[') and _is_json_array(line, config_file)):
+            return 'json'
+
+        # Sections of TOML array tables start with [[.
+        if line.startswith('[[') or TOML_TABLE_REGEX.match(line) or TOML_STRING_LINE_REGEX.match(line):
+            return 'toml'
+
+        if line.startswith(';') or (INI_SECTION_REGEX.match(line) and line.endswith(']')):
+            return 'ini'
+
+        if ENV_LINE_REGEX.match(line):
+            return 'env'
+
+        break
+
+    # YAML is the most permissive format, so we fall back to it.
+    return 'yaml'
+
+
+def _is_json_array(line, config_file):
+    # Only the files which could not be .INI files are parsed.
+    item = line[1:].lstrip()
+    if item and item[0] not in JSON_ARRAY_ITEM_STARTS:
+        return False
+
+    from json import loads
+    try:
+        loads(config_file)
+    except ValueError:
+        return False
+    return True
+
+
+def get_config_format(config_file_path, config_file):
+    """
+    Returns the format of a configuration file, from its extension or from its content.
+    """
+    config_file_path = config_file_path.lower()
+    for extension, format_name in CONFIG_FILE_EXTENSIONS.items():
+        if config_file_path.endswith(extension):
+            return format_name
+
+    return sniff_config_format(config_file)
 
 
 def load_config_file(config_file_path, config_file):
     """
-    Loads a config file, whether it is a yaml file or a .INI file.
+    Loads a config file, using the loader registered for its format.
 
     :param config_file_path: Path of the configuration file, used to infer the file format.
     :returns: Dictionary representation of the configuration file.
     """
+    format_name = get_config_format(config_file_path, config_file)
+
+    loader = CONFIG_LOADERS.get(format_name)
+    if loader is None:
+        raise ValueError("No loader available for the %s format." % format_name)
+
+    instrumentation.count('config_files')
+    with instrumentation.measure('parse_config'):
+        return loader(config_file)
+
+
+def check_config_structure(config):
+    """
+    Checks that a loaded configuration is a mapping of sections, which are mappings of options.
+
+    Empty YAML files, top-level lists or scalar sections cannot be validated.
+
+    :raises ValueError: If the configuration cannot be validated.
+    """
+    if not isinstance(config, Mapping):
+        raise ValueError("The configuration is not a mapping of sections.")
+
+    for section_name, section_config in config.items():
+        if not isinstance(section_config, Mapping):
+            raise ValueError("Section %s is not a mapping of options." % section_name)
+
+
+def _load_yaml(content):
+    # yaml is imported on first use, since importing it is a large part of the
+    # startup time of commands which do not need it.
+    import yaml
 
-    if config_file_path.lower().endswith(".yaml"):
-        return yaml.load(config_file)
+    # The libyaml bindings are much faster than the pure Python implementation,
+    # but they are not always available.
+    return yaml.load(content, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
 
-    if any(config_file_path.lower().endswith(extension) for extension in INI_FILE_EXTENSIONS):
-        return load_config_from_ini_file(config_file)
 
-    # At this point we have to guess the format of the configuration file.
+def _load_toml(content):
     try:
-        return yaml.load(config_file)
-    except yaml.YAMLError:
-        pass
+        from tomllib import loads
+    except ImportError:
+        from toml import loads
+    return loads(content)
 
+
+def _is_module_available(module_name):
+    # The TOML parsers are only looked up, so that they are imported on first use like yaml.
     try:
-        return load_config_from_ini_file(config_file)
-    except:
-        pass
+        from importlib.util import find_spec
+    except ImportError:
+        from pkgutil import find_loader as find_spec
+    return find_spec(module_name) is not None
 
-    raise Exception("Could not load configuration file!")
 
+def read_config_file(config_file_path):
+    """
+    Loads a configuration file from its path.
+
+    .INI files handled by the default loader are loaded as a `LazyConfig`, whose
+    values are only decoded when they are accessed.
+
+    :returns: Mapping representation of the configuration file.
+    """
+    format_name = CONFIG_FILE_EXTENSIONS.get(os.path.splitext(config_file_path)[1].lower())
+    if format_name == 'ini' and CONFIG_LOADERS.get('ini') is load_config_from_ini_file:
+        from confirm.lazy import LazyConfig
+
+        instrumentation.count('config_files')
+        with instrumentation.measure('parse_config'):
+            return LazyConfig(config_file_path)
+
+    with instrumentation.measure('read_config'):
+        with open(config_file_path, 'r') as config_file:
+            config_file = config_file.read()
+    return load_config_file(config_file_path, config_file)
+
+
+def load_config_from_yaml_file(yaml_file_content):
+    return _load_yaml(yaml_file_content)
 
-def load_config_from_ini_file(ini_file_content):
-    ini_file_buffer = StringIO(ini_file_content)
 
+def load_config_from_json_file(json_file_content):
+    # The C implementation is preferred when it is installed.
     try:
+        from orjson import loads
+    except ImportError:
+        from json import loads
+    return loads(json_file_content)
+
+
+def load_config_from_env_file(env_file_content):
+    """
+    Loads a .env file, where the `SECTION__OPTION` keys are mapped to the option of a section.
+
+    Keys without a section go to the ENV_DEFAULT_SECTION section.
+    """
+    response = {}
+
+    for line_number, line in enumerate(env_file_content.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        match = ENV_LINE_REGEX.match(line)
+        if not match:
+            raise ValueError("Could not parse line %d : %s" % (line_number, line))
+
+        value = match.group('value').strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'"):
+            value = value[1:-1]
+
+        section_name, _, option_name = match.group('key').rpartition(ENV_SECTION_SEPARATOR)
+        response.setdefault(section_name or ENV_DEFAULT_SECTION, {})[option_name] = value
+
+    return response
+
+
+def load_config_from_ini_file(ini_file_content):
+    try:
+        from configparser import ConfigParser
         config_parser = ConfigParser(interpolation=None)
-    except NameError:
+    except ImportError:
+        from ConfigParser import RawConfigParser
         config_parser = RawConfigParser()
 
-    config_parser.readfp(ini_file_buffer)
+    ini_file_buffer = StringIO(ini_file_content)
+
+    # readfp was removed in Python 3.12, read_file does not exist in Python 2.
+    getattr(config_parser, 'read_file', config_parser.readfp)(ini_file_buffer)
     return config_parser_to_dict(config_parser)
 
 
+def _join_ini_value(value_lines):
+    # Like ConfigParser, empty lines at the end of a multiline value are dropped.
+    while value_lines and not value_lines[-1]:
+        value_lines.pop()
+    return '\n'.join(value_lines)
+
+
+def iter_ini_file(ini_file):
+    """
+    Reads a .INI file line by line, without loading it in memory.
+
+    The parsing follows the rules of `ConfigParser` without interpolation: option
+    names are lowercased, comments are whole lines starting with `#` or `;`, and
+    indented lines continue the value of the previous option. Values of the
+    DEFAULT section are applied to all the sections, so it must come first since
+    the file is not read twice.
+
+    :param ini_file: File object, or any iterable of lines, of the .INI file.
+    :returns: Generator of `(section, option, value)` events, grouped by section.
+    """
+    defaults = {}
+    section_name = None
+    section_option_names = set()
+
+    # Name, indentation and value lines of the option being read.
+    option = None
+
+    for line_number, line in enumerate(ini_file, 1):
+        stripped_line = line.strip()
+
+        if not stripped_line:
+            if option is not None:
+                option[2].append('')
+            continue
+
+        if stripped_line[0] in INI_COMMENT_PREFIXES:
+            continue
+
+        indentation = len(line) - len(line.lstrip())
+        if option is not None and indentation > option[1]:
+            option[2].append(stripped_line)
+            continue
+
+        if option is not None:
+            if section_name == INI_DEFAULT_SECTION:
+                defaults[option[0]] = _join_ini_value(option[2])
+            else:
+                yield section_name, option[0], _join_ini_value(option[2])
+            option = None
+
+        section_match = INI_SECTION_REGEX.match(stripped_line)
+        if section_match:
+            for option_name, value in _missing_ini_defaults(section_name, section_option_names, defaults):
+                yield section_name, option_name, value
+
+            header = section_match.group('header')
+            if header == INI_DEFAULT_SECTION and section_name not in (None, INI_DEFAULT_SECTION):
+                raise ValueError("The DEFAULT section must come before the other sections, at line %d." % line_number)
+
+            section_name = header
+            section_option_names = set()
+            continue
+
+        if section_name is None:
+            raise ValueError("Option defined before any section header at line %d." % line_number)
+
+        option_match = INI_OPTION_REGEX.match(stripped_line)
+        if not option_match:
+            raise ValueError("Could not parse line %d : %s" % (line_number, stripped_line))
+
+        option_name = option_match.group('option').rstrip().lower()
+        section_option_names.add(option_name)
+        option = (option_name, indentation, [option_match.group('value')])
+
+    if option is not None:
+        if section_name == INI_DEFAULT_SECTION:
+            defaults[option[0]] = _join_ini_value(option[2])
+        else:
+            yield section_name, option[0], _join_ini_value(option[2])
+
+    for option_name, value in _missing_ini_defaults(section_name, section_option_names, defaults):
+        yield section_name, option_name, value
+
+
+def _missing_ini_defaults(section_name, section_option_names, defaults):
+    if section_name is None or section_name == INI_DEFAULT_SECTION:
+        return []
+    return [(option_name, value) for option_name, value in sorted(defaults.items()) if option_name not in section_option_names]
+
+
 def load_schema_file(schema_file):
-    return yaml.load(schema_file)
+    with instrumentation.measure('parse_schema'):
+        return _load_yaml(schema_file)
 
 
 def dump_schema_file(schema):
-    return yaml.dump(schema, default_flow_style=False)
+    import yaml
+    return yaml.dump(schema, Dumper=getattr(yaml, 'CSafeDumper', yaml.SafeDumper), default_flow_style=False)
+
+
+register_config_loader('yaml', load_config_from_yaml_file, YAML_FILE_EXTENSIONS)
+register_config_loader('ini', load_config_from_ini_file, INI_FILE_EXTENSIONS)
+register_config_loader('json', load_config_from_json_file, JSON_FILE_EXTENSIONS)
+register_config_loader('env', load_config_from_env_file, ENV_FILE_EXTENSIONS)
+if _is_module_available('tomllib') or _is_module_available('toml'):
+    register_config_loader('toml', _load_toml, TOML_FILE_EXTENSIONS)
@@ -1,160 +1,539 @@
 """
 Main module for the validation functionalities.
 """
-from confirm.utils import get_most_probable_typo
+from itertools import groupby
+from operator import itemgetter
+
+from confirm import issues
+from confirm.composition import load_schema
+from confirm.instrumentation import count, measure
+from confirm.issues import Issue
+from confirm.utils import TypoIndex
 from confirm.utils import config_parser_to_dict
-from confirm.utils import load_schema_file
-from confirm.utils import load_config_file
-
-
-VALID_TYPES = ('int', 'float', 'bool', 'list', 'str')
+from confirm.utils import iter_ini_file
+from confirm.utils import read_config_file
+from confirm.schema import CompiledSchema
+from confirm.schema import PATH_SEPARATOR
+from confirm.schema import VALID_TYPES  # noqa
+from confirm.schema import compile_schema
 
 
 def validator_from_config_file(config_file_path, schema_file_path):
-    schema = load_schema_file(open(schema_file_path, 'r'))
-    config = load_config_file(config_file_path, open(config_file_path, 'r').read())
+    schema = CompiledSchema(load_schema(schema_file_path), is_flat=True)
+    config = read_config_file(config_file_path)
     return Validation(config, schema)
 
 
 def validator_from_config_parser(config_parser, schema_file_path):
-    schema = load_schema_file(open(schema_file_path, 'r'))
+    schema = CompiledSchema(load_schema(schema_file_path), is_flat=True)
     config = config_parser_to_dict(config_parser)
     return Validation(config, schema)
 
 
 def validator_from_config(config, schema_file_path):
-    schema = load_schema_file(open(schema_file_path, 'r'))
+    schema = CompiledSchema(load_schema(schema_file_path), is_flat=True)
     return Validation(config, schema)
 
 
+def validate_ini_file(config_file_path, schema, error_on_deprecated=False):
+    """
+    Validates a .INI file while streaming it, without loading the whole configuration in memory.
+
+    :param schema: Dictionary representing the confirm schema, or a `CompiledSchema`.
+    :returns: The completed `Validation`.
+    """
+    validation = Validation(None, schema)
+    with open(config_file_path, 'r') as ini_file:
+        validation.validate_events(iter_ini_file(ini_file), error_on_deprecated)
+    return validation
+
+
+NUMBER_TYPES = (int, float)
+
+
+class _ErrorLimitReached(Exception):
+    pass
+
+
+def _is_absent(option_value):
+    # Empty values, like `option =` in .INI files, are considered as missing. Falsy values like 0 are not.
+    return option_value is None or option_value == ''
+
+
+def _deprecation_severity(error_on_deprecated):
+    return issues.ERROR if error_on_deprecated else issues.WARNING
+
+
+def _group_events_by_section(events):
+    seen_section_names = set()
+
+    for section_name, section_events in groupby(events, key=itemgetter(0)):
+        if section_name in seen_section_names:
+            raise ValueError("Section %s is not contiguous in the configuration." % section_name)
+        seen_section_names.add(section_name)
+
+        yield section_name, dict((option_name, value) for _, option_name, value in section_events)
+
+
+def iter_config_sections(config, path_trie):
+    """
+    Iterates over the sections of a configuration, nested ones included, in document order.
+
+    A mapping nested in a section is a section named by its dotted path, unless
+    the schema defines it as an option of the section. The path trie of the
+    schema is walked along with the configuration, so every value is visited
+    once, and iteratively, so deep documents do not hit the recursion limit.
+
+    :param config: Dictionary representing the configuration.
+    :param path_trie: Root `SchemaPathNode` of the schema.
+    :returns: Generator of (section name, section configuration) tuples.
+    """
+    for section_name, section_config in config.items():
+        # Most sections do not nest, and are yielded without walking the trie.
+        if not isinstance(section_config, dict) or not _holds_mapping(section_config):
+            yield section_name, section_config
+            continue
+
+        stack = [(section_name, path_trie.get(section_name), section_config)]
+        while stack:
+            section_name, node, section_config = stack.pop()
+
+            section = node.section if node is not None else None
+            nested_sections = [
+                (option_name, value) for option_name, value in section_config.items()
+                if isinstance(value, dict) and (section is None or option_name not in section.options)
+            ]
+            if not nested_sections:
+                yield section_name, section_config
+                continue
+
+            nested_names = set(option_name for option_name, _ in nested_sections)
+            options = dict(item for item in section_config.items() if item[0] not in nested_names)
+
+            # Mappings only holding nested sections are mere containers, unless the schema defines them.
+            if options or section is not None:
+                yield section_name, options
+
+            for option_name, value in reversed(nested_sections):
+                nested_node = node.get(option_name) if node is not None else None
+                stack.append((section_name + PATH_SEPARATOR + option_name, nested_node, value))
+
+
+def _holds_mapping(section_config):
+    for value in section_config.values():
+        if isinstance(value, dict):
+            return True
+    return False
+
+
+# Minimal number of sections of a configuration for its sections to be validated in parallel.
+MIN_PARALLEL_SECTIONS = 1000
+
+# Schema and configuration sections shared by the workers of a parallel validation.
+_worker_schema = None
+_worker_sections = None
+
+
+def _init_section_worker(schema, config_sections):
+    global _worker_schema, _worker_sections
+    _worker_schema = compile_schema(schema)
+    _worker_sections = config_sections
+
+
+def _validate_section_chunk(args):
+    start, end, error_on_deprecated, max_errors, coerce_values = args
+
+    validation = _SectionChunkValidation(_worker_schema, max_errors, coerce_values)
+    try:
+        validation._validate_present_sections(_worker_sections[start:end], error_on_deprecated)
+    except _ErrorLimitReached:
+        pass
+
+    return validation.chunk_issues, validation.typed_config()
+
+
 class Validation(object):
+    """
+    Validation of a configuration against a confirm schema.
+
+    :param config: Dictionary representing the configuration, or None when using `validate_events`.
+        Mappings nested in its sections are sections too, named by their dotted
+        path, unless the schema defines them as options.
+    :param schema: Dictionary representing the confirm schema, or a `CompiledSchema`.
+    """
 
     def __init__(self, config, schema):
-        self._schema = schema
+        self._compiled_schema = compile_schema(schema)
+        self._schema = self._compiled_schema.schema
         self._config = config
         self._errors = []
         self._warnings = []
+        self._max_errors = None
+        self._is_complete = False
+        self._typed_config = None
+
+    def validate(self, error_on_deprecated=False, fail_fast=False, max_errors=None, coerce_values=False, section_jobs=1):
+        """
+        Validates the configuration.
+
+        :param error_on_deprecated: Handles deprecated options / sections as errors.
+        :param fail_fast: Stops at the first error. Same as `max_errors=1`.
+        :param max_errors: Stops once this number of errors is reached. When the
+            number of errors is limited, typos are not detected.
+        :param coerce_values: Builds the configuration with its values converted to
+            their type while validating them, see `typed_config`.
+        :param section_jobs: Number of worker processes validating chunks of the
+            sections, 0 for one per CPU. Only used for configurations of at least
+            `MIN_PARALLEL_SECTIONS` sections. The issues are the same, in the same
+            order, as when validating the sections serially.
+        """
+        config_sections = self._get_config_sections()
+        if section_jobs != 1 and len(config_sections) >= MIN_PARALLEL_SECTIONS:
+            self._run(
+                self._validate_sections_in_parallel, (config_sections, error_on_deprecated, section_jobs),
+                fail_fast, max_errors, coerce_values
+            )
+            return
 
-    def validate(self, error_on_deprecated=False):
+        self._run(
+            self._validate_sections,
+            (config_sections, error_on_deprecated, set(section_name for section_name, _ in config_sections)),
+            fail_fast, max_errors, coerce_values
+        )
+
+    def _get_config_sections(self):
+        # Configurations whose values are never mappings, like the lazy views of .INI files, are not traversed.
+        if getattr(self._config, 'flat', False):
+            return list(self._config.items())
+        return list(iter_config_sections(self._config, self._compiled_schema.path_trie))
+
+    def validate_events(self, events, error_on_deprecated=False, fail_fast=False, max_errors=None, coerce_values=False):
+        """
+        Validates a configuration given as `(section, option, value)` events.
+
+        Only one section of the configuration is held in memory at a time, so
+        the events of a section must be consecutive, as yielded by `iter_ini_file`.
+        The other parameters are the same as for `validate`.
+        """
+        self._run(
+            self._validate_sections, (_group_events_by_section(events), error_on_deprecated),
+            fail_fast, max_errors, coerce_values
+        )
+
+    def _run(self, validation_function, args, fail_fast, max_errors, coerce_values):
+        self._max_errors = 1 if fail_fast else max_errors
+        self._typed_config = {} if coerce_values else None
+        try:
+            with measure('validate'):
+                validation_function(*args)
+            self._is_complete = True
+        except _ErrorLimitReached:
+            pass
 
-        section_names = set(self._schema.keys()) | set(self._config.keys())
-        for section_name in section_names:
+        count('issues', len(self._errors) + len(self._warnings))
 
-            if not self._schema.get(section_name):
-                self._warnings.append("Section %s is not defined in the schema file." % section_name)
-                continue
+    def _find_typo(self, typo_index, name):
+        count('typo_lookups')
+        with measure('typo_matching'):
+            return typo_index.get_most_probable_typo(name)
 
-            section_options = self._schema[section_name].values()
-            section_has_required_option = any(option for option in section_options if option.get('required'))
-            section_is_deprecated = all(option.get('deprecated') for option in section_options)
-            section_is_present = section_name in self._config
+    def _detects_typos(self):
+        return self._max_errors is None
 
-            best_match = None
-            if not section_is_present:
-                # We only detect typos using sections not defined in the schema.
-                orphan_sections = set(self._config.keys()) - set(self._schema.keys())
-                best_match = get_most_probable_typo(section_name, orphan_sections)
+    def _validate_sections(self, config_sections, error_on_deprecated, config_section_names=None):
+
+        # When the section names are known beforehand, missing sections are reported
+        # first since they are the cheapest errors to find.
+        if config_section_names is not None:
+            self._validate_missing_sections(config_section_names)
+
+        present_section_names = self._validate_present_sections(config_sections, error_on_deprecated)
+
+        if config_section_names is None:
+            self._validate_missing_sections(present_section_names)
+
+    def _validate_sections_in_parallel(self, config_sections, error_on_deprecated, jobs):
+        import multiprocessing
+
+        # Missing sections and their typos depend on every section name, they are found first like in `validate`.
+        self._validate_missing_sections(set(section_name for section_name, _ in config_sections))
+
+        schema = self._compiled_schema
+        if getattr(multiprocessing, 'get_start_method', lambda: 'fork')() != 'fork':
+            # The sections and the schema are sent to the workers instead of being inherited. Lazy
+            # sections cannot be, and the schema dictionary is faster to send and compile again.
+            config_sections = [(section_name, dict(section_config)) for section_name, section_config in config_sections]
+            schema = schema.schema
+
+        jobs = jobs or multiprocessing.cpu_count()
+        chunk_size = max(1, len(config_sections) // (jobs * 4))
+        tasks = [
+            (start, start + chunk_size, error_on_deprecated, self._max_errors, self._typed_config is not None)
+            for start in range(0, len(config_sections), chunk_size)
+        ]
+
+        pool = multiprocessing.Pool(jobs, initializer=_init_section_worker, initargs=(schema, config_sections))
+        try:
+            # Replaying the issues of the chunks in order gives the same issues, and
+            # stops at the same error, as the serial validation.
+            for chunk_issues, typed_sections in pool.imap(_validate_section_chunk, tasks):
+                if typed_sections is not None:
+                    self._typed_config.update(typed_sections)
+                for issue in chunk_issues:
+                    self._record_issue(issue)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _validate_present_sections(self, config_sections, error_on_deprecated):
+        """
+        :returns: Set of the names of the sections present in the configuration.
+        """
+        present_section_names = set()
+        for section_name, section_config in config_sections:
+            present_section_names.add(section_name)
+
+            section = self._compiled_schema.get_section(section_name)
+            if section is None or section.is_deprecated:
+                if self._typed_config is not None:
+                    self._typed_config[section_name] = dict(section_config)
+
+            if section is None:
+                self._add_issue(issues.UNDEFINED_SECTION, issues.WARNING, section_name)
+                continue
 
             # Note that if a section is deprecated, we do not perform any further validation!
-            if section_is_deprecated and section_is_present:
-                if error_on_deprecated:
-                    self._errors.append("Deprecated section %s is present!" % section_name)
-                else:
-                    self._warnings.append("Deprecated section %s is present!" % section_name)
+            if section.is_deprecated:
+                self._add_issue(issues.DEPRECATED_SECTION, _deprecation_severity(error_on_deprecated), section_name)
 
-            elif section_has_required_option and not section_is_present:
-                if best_match:
-                    self._errors.append("Missing required section %s (%s is a possible typo!)." % (section_name, best_match))
-                else:
-                    self._errors.append("Missing required section %s." % section_name)
+            # Section is present, standard validations.
+            else:
+                self._validate_section(section, section_config, error_on_deprecated)
 
-            elif not section_has_required_option and not section_is_present:
-                if best_match:
-                    self._warnings.append("Possible typo for section %s : %s." % (section_name, best_match))
+        return present_section_names
+
+    def _validate_missing_sections(self, present_section_names):
 
-            # Section is present but not required, standard validations.
-            elif section_is_present:
-                self._validate_section(section_name, error_on_deprecated)
+        section_typo_index = None
+        for section_name in sorted(self._compiled_schema.section_names - present_section_names):
+
+            section = self._compiled_schema.get_section(section_name)
+
+            best_match = None
+            if self._detects_typos():
+                # We only detect typos using sections not defined in the schema.
+                if section_typo_index is None:
+                    section_typo_index = TypoIndex(present_section_names - self._compiled_schema.section_names)
+                best_match = self._find_typo(section_typo_index, section_name)
+
+            if section.has_required_option:
+                self._add_issue(issues.MISSING_SECTION, issues.ERROR, section_name, suggestion=best_match)
+
+            elif best_match:
+                self._add_issue(issues.SECTION_TYPO, issues.WARNING, section_name, suggestion=best_match)
 
     def is_valid(self):
         return not self._errors
 
     def errors(self):
-        return self._errors
+        return [issue.message for issue in self._errors]
 
     def warnings(self):
-        return self._warnings
+        return [issue.message for issue in self._warnings]
 
-    def _validate_section(self, section_name, error_on_deprecated):
+    def is_complete(self):
+        """
+        Returns False if the validation stopped because the maximum number of errors was reached.
+        """
+        return self._is_complete
 
-        # Required fields validation.
-        option_names = set(self._schema.get(section_name, {}).keys()) | set(self._config.get(section_name, {}).keys())
-        for option_name in option_names:
+    def typed_config(self):
+        """
+        Returns the configuration with the values of the typed options converted to their type.
+
+        Only available after validating with `coerce_values=True`. Invalid values
+        are left as is.
+        """
+        return self._typed_config
 
-            if not self._schema.get(section_name, {}).get(option_name):
-                self._warnings.append("Option %s of section %s is not defined in the schema file." % (option_name, section_name))
+    def issues(self):
+        """
+        Returns the errors and the warnings as `Issue` records, without rendering their messages.
+        """
+        return self._errors + self._warnings
+
+    def _add_issue(self, code, severity, section_name, option_name=None, **kwargs):
+        self._record_issue(Issue(code, severity, section_name, option_name, **kwargs))
+
+    def _record_issue(self, issue):
+        if issue.severity == issues.ERROR:
+            self._errors.append(issue)
+            if self._max_errors is not None and len(self._errors) >= self._max_errors:
+                raise _ErrorLimitReached()
+        else:
+            self._warnings.append(issue)
+
+    def _validate_section(self, section, section_config, error_on_deprecated):
+
+        section_name = section.name
+        config_option_names = set(section_config.keys())
+
+        # We only detect typos using options not defined in the schema.
+        option_typo_index = None
+
+        # Required fields validation.
+        option_names = section.option_names | config_option_names
+        count('options_checked', len(option_names))
+
+        # Present options which are not deprecated have no issue, only the other ones
+        # are checked, unless some values are empty and must be handled as missing. Only the values
+        # of the options defined in the schema are looked at, so that lazy sections are not decoded.
+        present_option_names = section.option_names & config_option_names
+        if not any(_is_absent(section_config.get(option_name)) for option_name in present_option_names):
+            option_names = (
+                (section.option_names ^ config_option_names) | (section.deprecated_option_names & config_option_names)
+            )
+
+        for option_name in sorted(option_names):
+
+            option = section.options.get(option_name)
+            if option is None:
+                self._add_issue(issues.UNDEFINED_OPTION, issues.WARNING, section_name, option_name)
                 continue
 
-            option_is_required = self._schema[section_name][option_name].get('required')
-            option_is_deprecated = self._schema[section_name][option_name].get('deprecated')
-            option_is_present = self._config[section_name].get(option_name)
+            option_is_present = not _is_absent(section_config.get(option_name))
 
             best_match = None
-            if not option_is_present:
-                # We only detect typos using options not defined in the schema.
-                orphan_options = set(self._config[section_name].keys()) - set(self._schema[section_name].keys())
-                best_match = get_most_probable_typo(option_name, orphan_options)
+            if not option_is_present and self._detects_typos():
+                if option_typo_index is None:
+                    option_typo_index = TypoIndex(config_option_names - section.option_names)
+                best_match = self._find_typo(option_typo_index, option_name)
 
             # Note that if an option is deprecated, we do not perform any further validation!
-            if option_is_deprecated and option_is_present:
-                if error_on_deprecated:
-                    self._errors.append("Deprecated option %s is present in section %s!" % (option_name, section_name))
-                else:
-                    self._warnings.append("Deprecated option %s is present in section %s!" % (option_name, section_name))
+            if option.deprecated and option_is_present:
+                self._add_issue(issues.DEPRECATED_OPTION, _deprecation_severity(error_on_deprecated), section_name, option_name)
+
+            elif option.required and not option_is_present:
+                self._add_issue(issues.MISSING_OPTION, issues.ERROR, section_name, option_name, suggestion=best_match)
 
-            elif option_is_required and not option_is_present:
+            elif not option.required and not option_is_present:
                 if best_match:
-                    self._errors.append(
-                        "Missing required option %s in section %s "
-                        "(%s is a possible typo!)." % (option_name, section_name, best_match)
-                    )
+                    self._add_issue(issues.OPTION_TYPO, issues.WARNING, section_name, option_name, suggestion=best_match)
+
+        typed_section = None
+        if self._typed_config is not None:
+            typed_section = self._typed_config[section_name] = dict(section_config)
+
+        # Type and constraints validation.
+        with measure('type_checking'):
+            for option_name, option in section.options.items():
+
+                option_value = section_config.get(option_name)
+
+                if option_value is None:
+                    continue
+
+                # Fast path of the values of typed options without constraints.
+                coerce = option.coerce
+                if coerce is not None and option.constraints is None and option_value != '':
+                    try:
+                        typed_value = coerce(option_value)
+                    except (TypeError, ValueError):
+                        typed_value = self._validate_option_type(section_name, option, option_value)
                 else:
-                    self._errors.append("Missing required option %s in section %s." % (option_name, section_name))
+                    typed_value = self._validate_option_type(section_name, option, option_value)
 
-            elif not option_is_required and not option_is_present:
-                if best_match:
-                    self._warnings.append("Possible typo for option %s : %s." % (option_name, best_match))
+                if typed_section is not None:
+                    typed_section[option_name] = typed_value
+
+    def _validate_option_type(self, section_name, option, option_value):
+        """
+        Returns the value converted to the type of the option, or the value itself if it cannot be converted.
 
-        # Type validation.
-        for option_name in self._schema[section_name]:
+        The constraints of the option are only checked on values of the right type.
+        """
 
-            option_value = self._config[section_name].get(option_name)
+        # Like missing values, empty values are neither type checked nor checked against the constraints.
+        if option_value == '':
+            return option_value
 
-            if not option_value:
+        # No type validation to perform.
+        if not option.type:
+            typed_value = option_value
+
+        elif not option.type_is_valid:
+            self._add_issue(issues.INVALID_EXPECTED_TYPE, issues.ERROR, section_name, option.name, expected_type=option.type)
+            return option_value
+
+        else:
+            try:
+                typed_value = option.coerce(option_value)
+            except (TypeError, ValueError):
+                self._add_issue(
+                    issues.INVALID_VALUE, issues.ERROR, section_name, option.name, value=option_value, expected_type=option.type
+                )
+                return option_value
+
+        if option.constraints is not None:
+            self._validate_option_constraints(section_name, option, option_value, typed_value)
+
+        return typed_value
+
+    def _validate_option_constraints(self, section_name, option, option_value, typed_value):
+        constraints = option.constraints
+
+        def add_issue(code, value, constraint):
+            self._add_issue(code, issues.ERROR, section_name, option.name, value=value, constraint=constraint)
+
+        if constraints.min_length is not None or constraints.max_length is not None:
+            length = len(typed_value) if isinstance(typed_value, list) else len(str(option_value))
+            if constraints.min_length is not None and length < constraints.min_length:
+                add_issue(issues.INVALID_LENGTH, length, 'at least %d' % constraints.min_length)
+            if constraints.max_length is not None and length > constraints.max_length:
+                add_issue(issues.INVALID_LENGTH, length, 'at most %d' % constraints.max_length)
+
+        # The items of lists are checked one by one.
+        for value in (typed_value if option.type == 'list' else (typed_value,)):
+
+            if constraints.choices is not None:
+                try:
+                    is_valid_choice = (value if constraints.compares_typed_choices else str(value)) in constraints.choices
+                except TypeError:
+                    is_valid_choice = False
+                if not is_valid_choice:
+                    add_issue(issues.INVALID_CHOICE, value, constraints.choices_description)
+
+            if constraints.pattern is not None and not constraints.pattern.search(value if hasattr(value, 'split') else str(value)):
+                add_issue(issues.PATTERN_MISMATCH, value, constraints.pattern.pattern)
+
+            # Empty values, which are not type checked, cannot be compared to the bounds.
+            if not isinstance(value, NUMBER_TYPES):
                 continue
 
-            option_schema = self._schema[section_name][option_name]
-            self._validate_option_type(option_name, option_value, option_schema)
+            if constraints.minimum is not None and value < constraints.minimum:
+                add_issue(issues.OUT_OF_RANGE, value, 'at least %s' % constraints.minimum)
 
-    def _validate_option_type(self, option_name, option_value, option_schema):
+            if constraints.maximum is not None and value > constraints.maximum:
+                add_issue(issues.OUT_OF_RANGE, value, 'at most %s' % constraints.maximum)
 
-        expected_type = option_schema.get('type')
 
-        # No type validation to perform.
-        if not expected_type:
-            return
+class _SectionChunkValidation(Validation):
+    """
+    Validation of a chunk of the sections of a configuration, in a worker process.
 
-        if expected_type not in VALID_TYPES:
-            self._errors.append("Invalid expected type for option %s : %s." % (option_name, expected_type))
-            return
+    The errors and the warnings are recorded in a single list, so that their
+    order can be replayed by the parent validation.
+    """
 
-        try:
-            if expected_type == 'int':
-                int(option_value)
-            elif expected_type == 'bool':
-                if not option_value.lower() in ('true', 'false', '1', '0'):
-                    raise ValueError()
-            elif expected_type == 'float':
-                float(option_value)
-        except ValueError:
-            self._errors.append("Invalid value for type %s : %s." % (expected_type, option_value))
+    def __init__(self, schema, max_errors, coerce_values):
+        Validation.__init__(self, None, schema)
+        self._max_errors = max_errors
+        self._typed_config = {} if coerce_values else None
+        self.chunk_issues = []
+
+    def _record_issue(self, issue):
+        self.chunk_issues.append(issue)
+        if issue.severity == issues.ERROR:
+            self._errors.append(issue)
+            if self._max_errors is not None and len(self._errors) >= self._max_errors:
+                raise _ErrorLimitReached()
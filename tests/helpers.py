@@ -0,0 +1,24 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TemporaryDirectoryTestCase(unittest.TestCase):
+    """Test case writing its files in a temporary directory removed after each test."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, file_name, content, mtime=None):
+        path = os.path.join(self.directory, file_name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as opened_file:
+            opened_file.write(content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
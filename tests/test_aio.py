@@ -0,0 +1,59 @@
+import sys
+import unittest
+
+if sys.version_info >= (3, 6):
+    import asyncio
+    from confirm import aio
+
+from helpers import TemporaryDirectoryTestCase
+
+
+SCHEMA = {'section': {'option': {'required': True, 'type': 'int'}}}
+
+
+def _collect(async_generator):
+    """
+    Returns the items of an asynchronous generator, without the async syntax which Python 2 cannot parse.
+    """
+    loop = asyncio.new_event_loop()
+    items = []
+    try:
+        while True:
+            try:
+                items.append(loop.run_until_complete(async_generator.__anext__()))
+            except StopAsyncIteration:
+                return items
+    finally:
+        loop.close()
+
+
+@unittest.skipIf(sys.version_info < (3, 6), "The asyncio API requires Python 3.6.")
+class ValidateManyTestCase(TemporaryDirectoryTestCase):
+
+    def test_validate_many(self):
+        configs = [
+            self._write('valid.ini', "[section]\noption = 1"),
+            ('invalid.ini', "[section]\noption = one"),
+            ('payload.yaml', "section:\n  option: 2"),
+            ('broken.yaml', "[[[section]]]\n  option=value"),
+        ]
+
+        results = dict(_collect(aio.validate_many(configs, SCHEMA, max_pending=2)))
+
+        self.assertEqual(sorted(results), sorted([configs[0], 'invalid.ini', 'payload.yaml', 'broken.yaml']))
+        self.assertEqual(results[configs[0]], [])
+        self.assertEqual(results['payload.yaml'], [])
+        self.assertEqual([issue.code for issue in results['invalid.ini']], ['invalid-value'])
+        self.assertEqual([issue.code for issue in results['broken.yaml']], ['unloadable-config'])
+
+    def test_validate_config(self):
+        loop = asyncio.new_event_loop()
+        try:
+            config_path, issues = loop.run_until_complete(
+                aio.validate_config(('config.ini', "[other]\noption = 1"), SCHEMA, error_on_deprecated=True)
+            )
+        finally:
+            loop.close()
+
+        self.assertEqual(config_path, 'config.ini')
+        self.assertIn('missing-section', [issue.code for issue in issues])
@@ -0,0 +1,162 @@
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+import os
+
+from confirm import batch
+
+import yaml
+
+from helpers import TemporaryDirectoryTestCase
+
+
+SCHEMA = """
+"section":
+    "option":
+        "required": true
+        "type": "int"
+""".strip()
+
+
+class BatchTestCase(TemporaryDirectoryTestCase):
+
+    def setUp(self):
+        super(BatchTestCase, self).setUp()
+        self.schema = yaml.safe_load(StringIO(SCHEMA))
+
+    def test_expand_directory(self):
+        valid = self._write('b/valid.ini', "[section]\noption = 1")
+        invalid = self._write('a/invalid.conf', "[section]\noption = one")
+        self._write('a/README', "Not a configuration file.")
+
+        self.assertEqual(batch.expand_config_paths([self.directory]), [invalid, valid])
+
+    def test_expand_glob(self):
+        first = self._write('first.ini', "[section]\noption = 1")
+        second = self._write('second.ini', "[section]\noption = 1")
+
+        config_file_paths = batch.expand_config_paths([os.path.join(self.directory, '*.ini'), first])
+        self.assertEqual(config_file_paths, [first, second])
+
+    def test_expand_excluded_paths(self):
+        config = self._write('config.yaml', "section:\n  option: 1")
+        schema = self._write('schema.yaml', "section:\n  option:\n    type: int")
+
+        self.assertEqual(batch.expand_config_paths([self.directory], [schema]), [config])
+        self.assertEqual(batch.expand_config_paths([os.path.join(self.directory, '*.yaml')], [schema]), [config])
+        self.assertEqual(batch.expand_config_paths([schema], [schema]), [schema])
+
+    def test_expand_no_match(self):
+        self.assertRaises(ValueError, batch.expand_config_paths, [os.path.join(self.directory, '*.ini')])
+
+    def test_validate_files(self):
+        paths = [
+            self._write('valid.ini', "[section]\noption = 1"),
+            self._write('invalid.ini', "[section]\noption = one"),
+            self._write('missing.ini', "[other]\noption = 1"),
+        ]
+
+        for jobs in (1, 2):
+            results = list(batch.validate_config_files(paths, self.schema, jobs=jobs))
+
+            self.assertEqual([path for path, _ in results], paths)
+            self.assertEqual(results[0][1], [])
+            self.assertIn("Invalid value for type int : one.", [issue.message for issue in results[1][1]])
+            self.assertIn("Missing required section section.", [issue.message for issue in results[2][1]])
+
+    def test_unloadable_file(self):
+        path = self._write('broken.yaml', "[[[section]]]\n  option=value")
+
+        results = list(batch.validate_config_files([path], self.schema))
+        self.assertEqual(len(results[0][1]), 1)
+        self.assertEqual(results[0][1][0].code, 'unloadable-config')
+        self.assertTrue(results[0][1][0].is_error())
+
+    def test_not_mapping_files(self):
+        paths = [
+            self._write('empty.yaml', ""),
+            self._write('list.yaml', "- section"),
+            self._write('scalar.yaml', "section: 5"),
+        ]
+
+        for jobs in (1, 2):
+            results = list(batch.validate_config_files(paths, self.schema, jobs=jobs))
+            self.assertEqual([[issue.code for issue in file_issues] for _, file_issues in results], [['unloadable-config']] * 3)
+
+    def test_infer_schema(self):
+        paths = [
+            self._write('first.ini', "[section]\noption = 1\nflag = true"),
+            self._write('second.yaml', "section:\n  option: 2\n  name: value"),
+            self._write('broken.yaml', "[[[section]]]\n  option=value"),
+        ]
+
+        for jobs in (1, 2):
+            schema, errors = batch.infer_schema_from_files(paths, jobs=jobs)
+
+            self.assertEqual([path for path, _ in errors], [paths[2]])
+            self.assertEqual(schema['section']['option']['type'], 'int')
+            self.assertTrue(schema['section']['option']['required'])
+            self.assertEqual(schema['section']['flag']['type'], 'bool')
+            self.assertNotIn('required', schema['section']['name'])
+
+
+class MigrateTestCase(TemporaryDirectoryTestCase):
+
+    SCHEMA = {
+        "section": {
+            "option1": {"required": True, "description": "Option 1."},
+            "option2": {"description": "Option 2."},
+        },
+    }
+
+    def _read(self, path):
+        with open(path, 'r') as config_file:
+            return config_file.read()
+
+    def test_migrate(self):
+        path = self._write('config.ini', "[section]\noption2 = value")
+
+        _, migrated_config, changed, skipped, error = batch.migrate_config_file(path, self.SCHEMA)
+        self.assertFalse(skipped)
+        self.assertIsNone(error)
+        self.assertTrue(changed)
+        self.assertIn("option1 = TO FILL", migrated_config)
+        self.assertEqual(self._read(path), "[section]\noption2 = value", "The file should not be modified!")
+        self.assertNotIn('value', self.SCHEMA['section']['option2'], "The schema should not be modified!")
+
+    def test_migrate_in_place(self):
+        paths = [
+            self._write('first.ini', "[section]\noption2 = value"),
+            self._write('second.ini', "[section]\noption1 = value"),
+        ]
+
+        for jobs in (1, 2):
+            results = list(batch.migrate_config_files(paths, self.SCHEMA, jobs=jobs, in_place=True))
+            self.assertEqual([path for path, _, _, _, _ in results], paths)
+
+            # The migrated files are stable.
+            self.assertEqual([changed for _, _, changed, _, _ in results], [jobs == 1, jobs == 1])
+
+        self.assertIn("option1 = TO FILL", self._read(paths[0]))
+        self.assertNotIn("option2", self._read(paths[1]))
+        self.assertEqual(sorted(os.listdir(self.directory)), ['first.ini', 'second.ini'])
+
+    def test_migrate_in_place_other_formats(self):
+        ini_path = self._write('a.ini', "[section]\noption2 = value")
+        yaml_path = self._write('b.yaml', "section:\n  option2: value\n")
+
+        paths = batch.expand_config_paths([self.directory])
+        results = list(batch.migrate_config_files(paths, self.SCHEMA, in_place=True))
+        self.assertEqual([(path, skipped, error) for path, _, _, skipped, error in results], [
+            (ini_path, False, None), (yaml_path, True, None),
+        ])
+        self.assertEqual(self._read(yaml_path), "section:\n  option2: value\n")
+
+    def test_unloadable_file(self):
+        path = self._write('broken.ini', "option = value")
+
+        _, migrated_config, changed, _, error = batch.migrate_config_file(path, self.SCHEMA, in_place=True)
+        self.assertIsNone(migrated_config)
+        self.assertFalse(changed)
+        self.assertIsNotNone(error)
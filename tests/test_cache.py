@@ -0,0 +1,152 @@
+import json
+import os
+import pickle
+
+from confirm import batch
+from confirm import cache
+from confirm import instrumentation
+
+from helpers import TemporaryDirectoryTestCase
+
+
+SCHEMA = """
+"section":
+    "option":
+        "required": true
+""".strip()
+
+
+class SchemaCacheTestCase(TemporaryDirectoryTestCase):
+
+    def setUp(self):
+        super(SchemaCacheTestCase, self).setUp()
+        self.cache_directory = os.path.join(self.directory, 'cache')
+        self.schema_cache = cache.SchemaCache(self.cache_directory, max_entries=2)
+
+    def _entries(self):
+        return [file_name for file_name in os.listdir(self.cache_directory) if file_name.endswith(cache.CACHE_ENTRY_EXTENSION)]
+
+    def test_load(self):
+        path = self._write('schema.yaml', SCHEMA)
+
+        schema = self.schema_cache.load(path)
+        self.assertTrue(schema['section']['option']['required'])
+        self.assertEqual(len(self._entries()), 1)
+
+        self.assertEqual(self.schema_cache.load(path), schema)
+        self.assertEqual(list(self.schema_cache.resolve(path)[1]), [os.path.abspath(path)])
+
+    def test_cache_hit_skips_parsing(self):
+        path = self._write('schema.yaml', SCHEMA, mtime=1000)
+        self.schema_cache.load(path)
+
+        # Same mtime and size, the file is not read again.
+        self._write('schema.yaml', SCHEMA.replace('true', 'null'), mtime=1000)
+        self.assertTrue(self.schema_cache.load(path)['section']['option']['required'])
+
+    def test_invalidation(self):
+        path = self._write('schema.yaml', SCHEMA, mtime=1000)
+        self.schema_cache.load(path)
+
+        self._write('schema.yaml', SCHEMA.replace('true', 'false'), mtime=2000)
+        self.assertFalse(self.schema_cache.load(path)['section']['option']['required'])
+
+    def test_included_file_invalidation(self):
+        self._write('common.yaml', SCHEMA, mtime=1000)
+        path = self._write('schema.yaml', "$include: common.yaml", mtime=1000)
+        self.assertTrue(self.schema_cache.load(path)['section']['option']['required'])
+
+        self._write('common.yaml', SCHEMA.replace('true', 'false'), mtime=2000)
+        self.assertFalse(self.schema_cache.load(path)['section']['option']['required'])
+
+    def test_size_bound(self):
+        for index in range(4):
+            path = self._write('schema%d.yaml' % index, SCHEMA)
+            self.schema_cache.load(path)
+
+        self.assertEqual(len(self._entries()), 2)
+
+    def test_corrupted_entry(self):
+        path = self._write('schema.yaml', SCHEMA)
+        self.schema_cache.load(path)
+
+        for file_name in self._entries():
+            with open(os.path.join(self.cache_directory, file_name), 'w') as entry_file:
+                entry_file.write('corrupted')
+
+        self.assertTrue(self.schema_cache.load(path)['section']['option']['required'])
+
+    def test_clear(self):
+        self.schema_cache.load(self._write('schema.yaml', SCHEMA))
+        self.schema_cache.clear()
+        self.assertEqual(self._entries(), [])
+
+
+class ValidationManifestTestCase(TemporaryDirectoryTestCase):
+
+    def setUp(self):
+        super(ValidationManifestTestCase, self).setUp()
+        self.manifest_path = os.path.join(self.directory, 'manifest.json')
+        self.schema = {'section': {'option': {'required': True, 'type': 'int'}}}
+
+    def _validate(self, paths, schema=None, **validate_options):
+        manifest = cache.ValidationManifest(self.manifest_path, schema or self.schema, validate_options)
+        with instrumentation.instrument(instrumentation.Instrumentation()) as measures:
+            results = list(batch.validate_config_files(paths, schema or self.schema, manifest=manifest, **validate_options))
+        manifest.save()
+        return results, measures.counters
+
+    def test_replay(self):
+        paths = [
+            self._write('valid.ini', "[section]\noption = 1"),
+            self._write('invalid.ini', "[section]\noption = one"),
+        ]
+
+        results, counters = self._validate(paths)
+        self.assertEqual(counters['config_files'], 2)
+
+        replayed_results, counters = self._validate(paths)
+        self.assertEqual(replayed_results, results)
+        self.assertEqual(counters['cached_results'], 2)
+        self.assertNotIn('config_files', counters)
+
+    def test_json_manifest(self):
+        path = self._write('config.ini', "[section]\noption = one")
+        self._validate([path])
+
+        with open(self.manifest_path, 'r') as manifest_file:
+            entry = json.load(manifest_file)['entries'][path]
+        self.assertEqual([record['code'] for record in entry['issues']], ['invalid-value'])
+
+        # Manifests which are not JSON, such as pickled ones, are never loaded.
+        with open(self.manifest_path, 'wb') as manifest_file:
+            pickle.dump({'key': 'key', 'entries': {}}, manifest_file)
+        _, counters = self._validate([path])
+        self.assertEqual(counters['config_files'], 1)
+
+    def test_changed_file(self):
+        paths = [
+            self._write('first.ini', "[section]\noption = 1", mtime=1000),
+            self._write('second.ini', "[section]\noption = 1", mtime=1000),
+        ]
+        self._validate(paths)
+
+        # Same content with another modification time, the results are still valid.
+        self._write('first.ini', "[section]\noption = 1", mtime=2000)
+        self._write('second.ini', "[section]\noption = x", mtime=2000)
+
+        results, counters = self._validate(paths)
+        self.assertEqual(counters['cached_results'], 1)
+        self.assertEqual(counters['config_files'], 1)
+        self.assertEqual(results[0][1], [])
+        self.assertEqual([issue.code for issue in results[1][1]], ['invalid-value'])
+
+    def test_changed_schema(self):
+        path = self._write('config.ini', "[section]\noption = 1")
+        self._validate([path])
+
+        _, counters = self._validate([path], error_on_deprecated=True)
+        self.assertEqual(counters['config_files'], 1)
+
+        _, counters = self._validate([path], schema={'section': {'option': {'type': 'str'}}})
+        self.assertEqual(counters['config_files'], 1)
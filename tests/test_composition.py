@@ -0,0 +1,86 @@
+from confirm import composition
+
+from helpers import TemporaryDirectoryTestCase
+
+
+class SchemaResolverTestCase(TemporaryDirectoryTestCase):
+
+    def test_no_directives(self):
+        path = self._write('schema.yaml', "section:\n  option:\n    required: true")
+        self.assertEqual(composition.load_schema(path), {'section': {'option': {'required': True}}})
+
+    def test_include(self):
+        self._write('common.yaml', "section:\n  option:\n    required: true\n    type: int\nlogging:\n  level: {}")
+        self._write('teams/a.yaml', "team_a:\n  option:\n    type: str")
+        self._write('teams/b.yaml', "team_b:\n  option:\n    type: str")
+        path = self._write('schema.yaml', "\n".join([
+            "$include:",
+            "  - common.yaml",
+            "  - teams/*.yaml",
+            "section:",
+            "  option:",
+            "    required: false",
+        ]))
+
+        schema = composition.load_schema(path)
+        self.assertEqual(sorted(schema), ['logging', 'section', 'team_a', 'team_b'])
+        self.assertEqual(schema['section']['option'], {'required': False, 'type': 'int'})
+
+    def test_extends(self):
+        path = self._write('schema.yaml', "\n".join([
+            "$templates:",
+            "  server:",
+            "    host:",
+            "      required: true",
+            "    port:",
+            "      type: int",
+            "http_server:",
+            "  $extends: server",
+            "  port:",
+            "    description: HTTP port.",
+            "https_server:",
+            "  $extends: [http_server]",
+            "  certificate: {}",
+        ]))
+
+        schema = composition.load_schema(path)
+        self.assertEqual(sorted(schema), ['http_server', 'https_server'])
+        self.assertEqual(schema['http_server']['port'], {'type': 'int', 'description': 'HTTP port.'})
+        self.assertEqual(sorted(schema['https_server']), ['certificate', 'host', 'port'])
+        self.assertNotIn('$extends', schema['https_server'])
+
+    def test_include_cycle(self):
+        self._write('a.yaml', "$include: b.yaml")
+        path = self._write('b.yaml', "$include: a.yaml")
+        self.assertRaises(ValueError, composition.load_schema, path)
+
+    def test_extends_cycle(self):
+        path = self._write('schema.yaml', "a:\n  $extends: b\nb:\n  $extends: a")
+        self.assertRaises(ValueError, composition.load_schema, path)
+
+    def test_undefined_extended_section(self):
+        path = self._write('schema.yaml', "a:\n  $extends: b")
+        self.assertRaises(ValueError, composition.load_schema, path)
+
+    def test_shared_fragment_parsed_once(self):
+        common = self._write('common.yaml', "common:\n  option: {}")
+        self._write('a.yaml', "$include: common.yaml\na:\n  option: {}")
+        self._write('b.yaml', "$include: common.yaml\nb:\n  option: {}")
+        path = self._write('schema.yaml', "$include: [a.yaml, b.yaml]")
+
+        resolver = composition.SchemaResolver()
+        schema, dependencies = resolver.resolve(path)
+        self.assertEqual(sorted(schema), ['a', 'b', 'common'])
+        self.assertEqual(len(dependencies), 4)
+        self.assertIn(common, dependencies)
+        self.assertEqual(len(resolver._parsed_files), 4)
+
+        # Unchanged files are not parsed again.
+        self._write('a.yaml', "$include: common.yaml\na:\n  other_option: {}")
+        schema, _ = resolver.resolve(path)
+        self.assertIn('other_option', schema['a'])
+        self.assertEqual(len(resolver._parsed_files), 5)
+
+        _, dependencies = resolver.resolve(path)
+        resolver.retain(content_hash for _, content_hash in dependencies.values())
+        self.assertEqual(len(resolver._parsed_files), 4)
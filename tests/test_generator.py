@@ -33,7 +33,7 @@ class AppendValuesTestCase(unittest.TestCase):
                 "required": true
         """.strip()
 
-        schema = yaml.load(StringIO(schema_string))
+        schema = yaml.safe_load(StringIO(schema_string))
         config = config_from_config_string(config_string)
 
         migrated_config = generator.append_existing_values(schema, config)
@@ -53,12 +53,53 @@ class GenerateSchemaTestCase(unittest.TestCase):
         config_string = "[section]\noption1=value1\noption2=value2"
         schema_string = generator.generate_schema_file(config_string)
 
-        schema = yaml.load(StringIO(schema_string))
+        schema = yaml.safe_load(StringIO(schema_string))
         self.assertIn('section', schema)
         self.assertIn('option1', schema['section'])
         self.assertIn('description', schema['section']['option1']['description'])
         self.assertEqual('No description provided.', schema['section']['option1']['description'])
 
+    def test_init_types(self):
+        config_string = "[section]\noption1=1\noption2=1.5\noption3=true\noption4=value"
+        schema = yaml.safe_load(StringIO(generator.generate_schema_file(config_string)))
+
+        types = dict((option_name, option['type']) for option_name, option in schema['section'].items())
+        self.assertEqual(types, {'option1': 'int', 'option2': 'float', 'option3': 'bool', 'option4': 'str'})
+
+
+class SchemaInferenceTestCase(unittest.TestCase):
+
+    def _infer(self, configs, required_ratio=1.0):
+        schema_inference = generator.SchemaInference()
+        for config in configs:
+            schema_inference.add_config_types(generator.get_config_types(config))
+        return schema_inference.get_schema(required_ratio)
+
+    def test_most_specific_type(self):
+        schema = self._infer([
+            {'section': {'int': '1', 'float': '1', 'bool': '1', 'str': '1'}},
+            {'section': {'int': '2', 'float': '2.5', 'bool': 'false', 'str': 'one'}},
+        ])
+        for option_name in ('int', 'float', 'bool', 'str'):
+            self.assertEqual(schema['section'][option_name]['type'], option_name)
+
+    def test_native_types(self):
+        schema = self._infer([{'section': {'bool': True, 'float': 1.5, 'list': ['a', 'b'], 'mapping': {'a': 1}}}])
+        self.assertEqual(schema['section']['bool']['type'], 'bool')
+        self.assertEqual(schema['section']['float']['type'], 'float')
+        self.assertEqual(schema['section']['list']['type'], 'list')
+        self.assertNotIn('type', schema['section']['mapping'])
+
+    def test_required(self):
+        configs = [{'section': {'always': '1', 'often': '1'}}] * 3 + [{'section': {'always': '1'}}]
+
+        schema = self._infer(configs)
+        self.assertTrue(schema['section']['always']['required'])
+        self.assertNotIn('required', schema['section']['often'])
+
+        schema = self._infer(configs, required_ratio=0.75)
+        self.assertTrue(schema['section']['often']['required'])
+
 
 class GenerateConfigParserTestCase(unittest.TestCase):
 
@@ -148,7 +189,7 @@ class GenerateConfigParserTestCase(unittest.TestCase):
 class GenerateDocumentationTestCase(unittest.TestCase):
 
     def _call_generate_documentation(self, schema_string):
-        schema = yaml.load(StringIO(schema_string))
+        schema = yaml.safe_load(StringIO(schema_string))
         return generator.generate_documentation(schema)
 
     def test_basic_case(self):
@@ -202,3 +243,65 @@ class GenerateDocumentationTestCase(unittest.TestCase):
         documentation = self._call_generate_documentation(schema).split('\n')
 
         self.assertIn("The default value is 1.", documentation)
+
+
+class WriteDocumentationTestCase(unittest.TestCase):
+
+    SCHEMA = {
+        "section": {
+            "option": {"required": True, "type": "int", "description": "Port < 1024.", "default": 80},
+        },
+        "empty": {},
+    }
+
+    def test_stream(self):
+        stream = StringIO()
+        generator.write_documentation(self.SCHEMA, stream)
+        self.assertEqual(stream.getvalue(), generator.generate_documentation(self.SCHEMA))
+        self.assertNotIn('empty', stream.getvalue())
+
+    def test_markdown(self):
+        documentation = generator.generate_documentation(self.SCHEMA, 'markdown').split('\n')
+
+        self.assertIn("# Configuration documentation", documentation)
+        self.assertIn("## section", documentation)
+        self.assertIn("### option", documentation)
+        self.assertIn("**This option is required!**", documentation)
+        self.assertIn("The default value is `80`.", documentation)
+
+    def test_html(self):
+        documentation = generator.generate_documentation(self.SCHEMA, 'html').split('\n')
+
+        self.assertIn("<h2>section</h2>", documentation)
+        self.assertIn("<p>Port &lt; 1024.</p>", documentation)
+        self.assertEqual(documentation[-2], "</html>")
+
+
+class WriteConfigTestCase(unittest.TestCase):
+
+    def _assert_same_as_config_parser(self, config, include_all=False):
+        expected = StringIO()
+        generator.generate_config_parser(config, include_all).write(expected)
+
+        stream = StringIO()
+        generator.write_config(config, stream, include_all)
+        self.assertEqual(stream.getvalue(), expected.getvalue())
+
+    def test_empty_config(self):
+        self._assert_same_as_config_parser({})
+
+    def test_same_as_config_parser(self):
+        config = {
+            "section": {
+                "optionA": {"required": True, "description": "Same description.", "value": "multi\nline"},
+                "optionb": {"required": True, "description": "Same description.", "deprecated": True, "default": 12},
+                "optionc": {"default": "DC"},
+            },
+            "other": {
+                "option": {"value": "value"},
+                "# required": {"required": True, "value": "collision"},
+            },
+        }
+
+        self._assert_same_as_config_parser(config)
+        self._assert_same_as_config_parser(config, include_all=True)
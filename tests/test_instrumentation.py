@@ -0,0 +1,54 @@
+import unittest
+
+from confirm import instrumentation
+from confirm.utils import load_config_file
+from confirm.validator import Validation
+
+
+SCHEMA = {
+    "section": {
+        "option1": {"type": "int"},
+        "option2": {"required": True},
+    },
+}
+
+
+class InstrumentationTestCase(unittest.TestCase):
+
+    def _validate(self):
+        config = load_config_file('.ini', "[section]\noption1 = 1\noptoin2 = 2")
+        validation = Validation(config, SCHEMA)
+        validation.validate()
+        return validation
+
+    def test_disabled(self):
+        self.assertFalse(instrumentation.is_enabled())
+        self._validate()
+
+    def test_measures(self):
+        with instrumentation.instrument(instrumentation.Instrumentation()) as measures:
+            self.assertTrue(instrumentation.is_enabled())
+            self._validate()
+
+        self.assertFalse(instrumentation.is_enabled())
+
+        for phase in ('parse_config', 'compile_schema', 'validate', 'typo_matching', 'type_checking'):
+            self.assertIn(phase, measures.durations)
+        self.assertEqual(measures.calls['validate'], 1)
+
+        self.assertEqual(measures.counters['config_files'], 1)
+        self.assertEqual(measures.counters['options_checked'], 3)
+        self.assertEqual(measures.counters['typo_lookups'], 1)
+        self.assertEqual(measures.counters['issues'], 2)
+
+        self.assertIn('options_checked', measures.summary())
+
+    def test_callback(self):
+        received = []
+        with instrumentation.instrument(instrumentation.Instrumentation(lambda *measure: received.append(measure))):
+            instrumentation.count('counter', 2)
+            with instrumentation.measure('phase'):
+                pass
+
+        self.assertEqual(received[0], ('counter', None, 2))
+        self.assertEqual(received[1][0], 'phase')
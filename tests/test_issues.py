@@ -0,0 +1,32 @@
+import unittest
+
+from confirm import issues
+
+
+class IssueTestCase(unittest.TestCase):
+
+    def test_message(self):
+        issue = issues.Issue(issues.MISSING_OPTION, issues.ERROR, 'section', 'option')
+        self.assertEqual(issue.message, "Missing required option option in section section.")
+        self.assertEqual(str(issue), issue.message)
+        self.assertTrue(issue.is_error())
+
+    def test_message_with_suggestion(self):
+        issue = issues.Issue(issues.MISSING_SECTION, issues.ERROR, 'section', suggestion='sectoin')
+        self.assertEqual(issue.message, "Missing required section section (sectoin is a possible typo!).")
+
+    def test_to_dict(self):
+        issue = issues.Issue(issues.INVALID_VALUE, issues.ERROR, 'section', 'option', value='one', expected_type='int')
+        self.assertEqual(issue.to_dict(), {
+            'code': 'invalid-value',
+            'severity': 'error',
+            'section': 'section',
+            'option': 'option',
+            'value': 'one',
+            'expected_type': 'int',
+        })
+
+    def test_compact(self):
+        issue = issues.Issue(issues.UNDEFINED_SECTION, issues.WARNING, 'section')
+        self.assertFalse(hasattr(issue, '__dict__'))
+        self.assertFalse(issue.is_error())
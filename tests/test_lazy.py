@@ -0,0 +1,48 @@
+from confirm import utils
+from confirm import validator
+from confirm.lazy import LazyConfig
+
+from helpers import TemporaryDirectoryTestCase
+
+
+class LazyConfigTestCase(TemporaryDirectoryTestCase):
+
+    def _assert_same_as_config_parser(self, content):
+        with LazyConfig(self._write('config.ini', content)) as config:
+            lazy_config = dict((section_name, dict(section)) for section_name, section in config.items())
+        self.assertEqual(lazy_config, utils.load_config_from_ini_file(content))
+
+    def test_same_as_config_parser(self):
+        self._assert_same_as_config_parser("[section]\nOption = value\nother: 1 = 2\n\n[empty]\n")
+        self._assert_same_as_config_parser("[section]\noption = first\n  second\n\n  # comment\n\n  third\n\n\nnext = 1")
+        self._assert_same_as_config_parser("[section]\r\noption = 1\r\n  continued\r\n")
+        self._assert_same_as_config_parser("[DEFAULT]\ndefault = 1\n[a]\nother = 2\n[b]\ndefault = 3\n[DEFAULT]\nlate = 4")
+        self._assert_same_as_config_parser("")
+
+    def test_values_decoded_on_access(self):
+        with LazyConfig(self._write('config.ini', "[section]\noption1 = 1\noption2 = 2")) as config:
+            section = config['section']
+            self.assertEqual(sorted(section), ['option1', 'option2'])
+            self.assertEqual(section._values, {})
+
+            self.assertEqual(section.get('option1'), '1')
+            self.assertEqual(section._values, {'option1': '1'})
+
+    def test_errors(self):
+        for content in ("option = 1", "[section]\nnot an option", "[a]\n[a]", "[a]\nb = 1\nB = 2"):
+            self.assertRaises(ValueError, LazyConfig, self._write('config.ini', content))
+
+    def test_read_config_file(self):
+        config = utils.read_config_file(self._write('config.ini', "[section]\noption = 1"))
+        self.assertIsInstance(config, LazyConfig)
+
+        config = utils.read_config_file(self._write('config.yaml', "section:\n  option: 1"))
+        self.assertEqual(config, {'section': {'option': 1}})
+
+    def test_validation_decodes_schema_options_only(self):
+        schema = {'section': {'option0': {'required': True, 'type': 'int'}}}
+        content = "[section]\n" + "\n".join("option%d = %d" % (index, index) for index in range(100))
+        with LazyConfig(self._write('config.ini', content)) as config:
+            validation = validator.Validation(config, schema)
+            validation.validate()
+            self.assertEqual(list(config['section']._values), ['option0'])
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+import unittest
+
+
+# Modules which are only needed by some commands, and must not slow down the startup of the others.
+LAZY_MODULES = [
+    'yaml',
+    'multiprocessing',
+    'configparser',
+    'cProfile',
+    'socket',
+    'pickle',
+    'confirm.batch',
+    'confirm.cache',
+    'confirm.server',
+    'confirm.validator',
+    'confirm.utils',
+    'difflib',
+    'tomllib',
+]
+
+
+class StartupTestCase(unittest.TestCase):
+
+    def test_lazy_imports(self):
+        imported_modules = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys; import confirm.main; print("\\n".join(sys.modules))',
+        ]).decode('utf-8').split()
+
+        for module_name in LAZY_MODULES:
+            self.assertNotIn(module_name, imported_modules)
+
+    def test_choices(self):
+        from confirm import main
+        from confirm.generator import DOCUMENTATION_WRITERS
+        from confirm.reporters import REPORTERS
+
+        # The choices are not read from the registries, which are not imported at startup.
+        self.assertEqual(main.REPORTER_NAMES, sorted(REPORTERS))
+        self.assertEqual(main.DOCUMENTATION_FORMATS, sorted(DOCUMENTATION_WRITERS))
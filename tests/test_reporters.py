@@ -0,0 +1,90 @@
+import io
+import json
+import unittest
+from xml.etree import ElementTree
+
+from confirm import issues
+from confirm import reporters
+from confirm.issues import Issue
+
+
+FILE_ISSUES = [
+    ('a.ini', [
+        Issue(issues.UNDEFINED_OPTION, issues.WARNING, 'section', 'option'),
+        Issue(issues.MISSING_SECTION, issues.ERROR, 'required'),
+        Issue(issues.INVALID_VALUE, issues.ERROR, 'section', 'port', value='<80 & "x"\x01>', expected_type='int'),
+    ]),
+    ('b.ini', []),
+    ('c.ini', [Issue(issues.UNLOADABLE_CONFIG, issues.ERROR, value='bad file')]),
+]
+
+
+class _CountingStream(io.StringIO):
+
+    def __init__(self):
+        io.StringIO.__init__(self)
+        self.writes_count = 0
+
+    def write(self, text):
+        self.writes_count += 1
+        return io.StringIO.write(self, text)
+
+
+def _report(reporter_class, **kwargs):
+    stream = _CountingStream()
+    reporter = reporter_class(stream, **kwargs)
+    reporter.start()
+    for config_file_path, file_issues in FILE_ISSUES:
+        reporter.report_file(config_file_path, file_issues)
+    reporter.finish()
+    return stream
+
+
+class ReportersTestCase(unittest.TestCase):
+
+    def test_text(self):
+        stream = _report(reporters.TextReporter)
+        self.assertEqual(stream.getvalue().splitlines(), [
+            "Error   : a.ini : Missing required section required.",
+            "Error   : a.ini : Invalid value for type int : <80 & \"x\"\x01>.",
+            "Warning : a.ini : Option option of section section is not defined in the schema file.",
+            "Error   : c.ini : Could not load configuration file : bad file",
+        ])
+        self.assertEqual(stream.writes_count, 1)
+
+    def test_buffer_size(self):
+        stream = _report(reporters.JsonLinesReporter, buffer_size=1)
+        self.assertEqual(stream.writes_count, 4)
+        self.assertEqual([json.loads(line)['file'] for line in stream.getvalue().splitlines()], ['a.ini'] * 3 + ['c.ini'])
+
+    def test_json(self):
+        records = json.loads(_report(reporters.JsonReporter).getvalue())
+        self.assertEqual(records[1], {'code': 'missing-section', 'severity': 'error', 'section': 'required', 'file': 'a.ini'})
+
+    def test_junit(self):
+        root = ElementTree.fromstring(_report(reporters.JUnitReporter).getvalue())
+        suites = root.findall('testsuite')
+        self.assertEqual([suite.get('name') for suite in suites], ['a.ini', 'b.ini', 'c.ini'])
+        self.assertEqual([suite.get('failures') for suite in suites], ['1', '0', '1'])
+
+        testcase = suites[0].find('testcase')
+        self.assertEqual(testcase.find('failure').get('message'), '2 error(s)')
+        self.assertIn(u'<80 & "x"\ufffd>', testcase.find('failure').text)
+        self.assertIn('Option option of section section', testcase.find('system-out').text)
+        self.assertIsNone(suites[1].find('testcase/failure'))
+
+    def test_sarif(self):
+        log = json.loads(_report(reporters.SarifReporter).getvalue())
+        self.assertEqual(log['version'], '2.1.0')
+
+        run = log['runs'][0]
+        self.assertIn({'id': 'missing-section'}, run['tool']['driver']['rules'])
+        self.assertEqual([result['ruleId'] for result in run['results']], [
+            'undefined-option', 'missing-section', 'invalid-value', 'unloadable-config',
+        ])
+        self.assertEqual(run['results'][0]['level'], 'warning')
+        self.assertEqual(run['results'][0]['locations'], [{
+            'physicalLocation': {'artifactLocation': {'uri': 'a.ini'}},
+            'logicalLocations': [{'fullyQualifiedName': 'section.option', 'kind': 'member'}],
+        }])
+        self.assertNotIn('logicalLocations', run['results'][3]['locations'][0])
@@ -0,0 +1,137 @@
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+import unittest
+
+from confirm import schema as confirm_schema
+from confirm import validator
+from confirm.utils import load_config_file
+
+import yaml
+
+
+SCHEMA = """
+"section1":
+    "option1":
+        "required": true
+        "type": "int"
+    "option2":
+        "deprecated": true
+"section2":
+    "option3":
+        "deprecated": true
+"section3":
+""".strip()
+
+
+class CompiledSchemaTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.compiled_schema = confirm_schema.CompiledSchema(yaml.safe_load(StringIO(SCHEMA)))
+
+    def test_section_names(self):
+        self.assertEqual(self.compiled_schema.section_names, frozenset(['section1', 'section2']))
+        self.assertIsNone(self.compiled_schema.get_section('section3'))
+
+    def test_section_flags(self):
+        section1 = self.compiled_schema.get_section('section1')
+        self.assertTrue(section1.has_required_option)
+        self.assertFalse(section1.is_deprecated)
+
+        section2 = self.compiled_schema.get_section('section2')
+        self.assertFalse(section2.has_required_option)
+        self.assertTrue(section2.is_deprecated)
+
+    def test_options(self):
+        section1 = self.compiled_schema.get_section('section1')
+        self.assertEqual(section1.option_names, frozenset(['option1', 'option2']))
+
+        option1 = section1.options['option1']
+        self.assertTrue(option1.required)
+        self.assertFalse(option1.deprecated)
+        self.assertEqual(option1.type, 'int')
+        self.assertEqual(option1.coerce('12'), 12)
+
+        option2 = section1.options['option2']
+        self.assertTrue(option2.deprecated)
+        self.assertIsNone(option2.coerce)
+
+    def test_compile_schema_is_idempotent(self):
+        self.assertIs(confirm_schema.compile_schema(self.compiled_schema), self.compiled_schema)
+
+    def test_validation_reuses_compiled_schema(self):
+        for config_string in ("[section1]\noption1 = 1", "[section1]\noption1 = not an int"):
+            config = load_config_file('.ini', config_string)
+            validation = validator.Validation(config, self.compiled_schema)
+            validation.validate()
+
+            self.assertIs(validation._compiled_schema, self.compiled_schema)
+
+        self.assertIn("Invalid value for type int : not an int.", validation.errors())
+
+
+class TypeCoercersTestCase(unittest.TestCase):
+
+    def test_int(self):
+        coerce = confirm_schema.TYPE_COERCERS['int']
+        self.assertEqual(coerce('12'), 12)
+        self.assertEqual(coerce(3.0), 3)
+        self.assertRaises(ValueError, coerce, 3.7)
+        self.assertRaises(ValueError, coerce, True)
+        self.assertRaises(ValueError, coerce, float('inf'))
+
+    def test_bool(self):
+        coerce = confirm_schema.TYPE_COERCERS['bool']
+        self.assertIs(coerce('True'), True)
+        self.assertIs(coerce('0'), False)
+        self.assertIs(coerce(False), False)
+        self.assertRaises(ValueError, coerce, 'yes')
+
+    def test_list(self):
+        coerce = confirm_schema.TYPE_COERCERS['list']
+        self.assertEqual(coerce('a, b,c'), ['a', 'b', 'c'])
+        self.assertEqual(coerce(['a', 1]), ['a', 1])
+        self.assertRaises(ValueError, coerce, {'a': 1})
+
+    def test_str(self):
+        coerce = confirm_schema.TYPE_COERCERS['str']
+        self.assertEqual(coerce('value'), 'value')
+        self.assertEqual(coerce(12), '12')
+        self.assertRaises(ValueError, coerce, ['value'])
+
+
+class NestedSchemaTestCase(unittest.TestCase):
+
+    SCHEMA = {
+        'server': {
+            'name': {'required': True},
+            'http': {'port': {'type': 'int'}, 'tls': {'certificate': {'required': True}}},
+        },
+        'server.http': {'host': {}},
+        'logging': {'outputs': {'file': {'path': {'type': 'str'}}}},
+    }
+
+    def test_flatten(self):
+        self.assertEqual(confirm_schema.flatten_schema(self.SCHEMA), {
+            'server': {'name': {'required': True}},
+            'server.http': {'port': {'type': 'int'}, 'host': {}},
+            'server.http.tls': {'certificate': {'required': True}},
+            'logging.outputs.file': {'path': {'type': 'str'}},
+        })
+
+    def test_flat_schema_unchanged(self):
+        schema = yaml.safe_load(StringIO(SCHEMA))
+        self.assertIs(confirm_schema.flatten_schema(schema), schema)
+
+    def test_flat_schema_not_flattened_again(self):
+        flat_schema = confirm_schema.flatten_schema(self.SCHEMA)
+        self.assertIs(confirm_schema.CompiledSchema(flat_schema, is_flat=True).schema, flat_schema)
+
+    def test_path_trie(self):
+        compiled_schema = confirm_schema.CompiledSchema(self.SCHEMA)
+        trie = compiled_schema.path_trie
+        self.assertIs(trie.get('server').section, compiled_schema.get_section('server'))
+        self.assertIs(trie.get('server').get('http.tls').section, compiled_schema.get_section('server.http.tls'))
+        self.assertIsNone(trie.get('logging').section)
+        self.assertIsNone(trie.get('logging.other'))
@@ -0,0 +1,96 @@
+import os
+import socket
+import threading
+import unittest
+
+from confirm import server
+
+from helpers import TemporaryDirectoryTestCase
+
+
+SCHEMA = """
+"section":
+    "option":
+        "required": true
+        "type": "int"
+""".strip()
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix sockets are not available.")
+class ValidationServerTestCase(TemporaryDirectoryTestCase):
+
+    def setUp(self):
+        super(ValidationServerTestCase, self).setUp()
+        self.schema_file_path = self._write('schema.yaml', SCHEMA)
+
+        socket_path = os.path.join(self.directory, 'confirm.sock')
+        self.server = server.ValidationServer(socket_path)
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.start()
+
+        self.client = server.ValidationClient(socket_path)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.server_thread.join()
+        super(ValidationServerTestCase, self).tearDown()
+
+    def test_validate(self):
+        valid, issues = self.client.validate(self.schema_file_path, "[section]\noption = 1", 'config.ini')
+        self.assertTrue(valid)
+        self.assertEqual(issues, [])
+
+        valid, issues = self.client.validate(self.schema_file_path, "[section]\noption = one", 'config.ini')
+        self.assertFalse(valid)
+        self.assertEqual([issue.message for issue in issues], ["Invalid value for type int : one."])
+
+    def test_schema_is_kept(self):
+        self.client.validate(self.schema_file_path, "[section]\noption = 1")
+        schema = self.server.schema_store.get(self.schema_file_path)
+
+        self.client.validate(self.schema_file_path, "[section]\noption = 2")
+        self.assertIs(self.server.schema_store.get(self.schema_file_path), schema)
+
+    def test_schema_is_reloaded(self):
+        self.client.validate(self.schema_file_path, "[section]\noption = 1")
+        schema_store = self.server.schema_store
+
+        for index, option_type in enumerate(('str', 'float', 'int')):
+            self._write('schema.yaml', SCHEMA.replace('int', option_type), mtime=1000 + index)
+            valid, _ = self.client.validate(self.schema_file_path, "[section]\noption = 1")
+            self.assertTrue(valid)
+
+        # Only the current version of the schema file is kept parsed.
+        self.assertEqual(len(schema_store._resolver._parsed_files), 1)
+
+    def test_options(self):
+        valid, issues = self.client.validate(self.schema_file_path, "[other]\noption = 1", fail_fast=True)
+        self.assertFalse(valid)
+        self.assertEqual(len(issues), 1)
+
+    def test_serve_does_not_remove_files(self):
+        file_path = os.path.join(self.directory, 'important.txt')
+        with open(file_path, 'w') as important_file:
+            important_file.write('content')
+
+        self.assertRaises(ValueError, server.serve, file_path)
+        self.assertTrue(os.path.isfile(file_path))
+
+    def test_unloadable_config(self):
+        valid, issues = self.client.validate(self.schema_file_path, "option = 1", 'config.ini')
+        self.assertFalse(valid)
+        self.assertEqual([issue.code for issue in issues], ['unloadable-config'])
+
+        for config in ("", "- section", "section: 5"):
+            valid, issues = self.client.validate(self.schema_file_path, config, 'config.yaml')
+            self.assertFalse(valid)
+            self.assertEqual([issue.code for issue in issues], ['unloadable-config'])
+
+    def test_error(self):
+        self.assertRaises(RuntimeError, self.client.validate, os.path.join(self.directory, 'missing.yaml'), "")
+
+        # The connection is still usable after an error.
+        valid, _ = self.client.validate(self.schema_file_path, "[section]\noption = 1")
+        self.assertTrue(valid)
@@ -1,3 +1,9 @@
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+from difflib import get_close_matches
+import random
 import unittest
 
 import yaml
@@ -80,3 +86,110 @@ class LoadConfigFileTestCase(unittest.TestCase):
         loaded_config = utils.load_config_file(config_file_path, config_file)
 
         self.assertIn('section', loaded_config)
+
+
+class TypoIndexTestCase(unittest.TestCase):
+
+    def _assert_same_as_difflib(self, names, queries):
+        typo_index = utils.TypoIndex(names)
+
+        for query in queries:
+            matches = get_close_matches(query, names, n=1, cutoff=utils.DEFAULT_TYPO_RATIO)
+            expected = matches[0] if matches else None
+            self.assertEqual(typo_index.get_most_probable_typo(query), expected, query)
+
+    def test_typo(self):
+        typo_index = utils.TypoIndex(['option13', 'unrelated'])
+        self.assertEqual(typo_index.get_most_probable_typo('option1'), 'option13')
+        self.assertIsNone(typo_index.get_most_probable_typo('nothing_alike'))
+
+    def test_empty_index(self):
+        self.assertIsNone(utils.TypoIndex([]).get_most_probable_typo('option'))
+
+    def test_ties(self):
+        self._assert_same_as_difflib(['ab', 'ba', 'ac', 'ca'], ['aa', 'a', 'abc', ''])
+
+    def test_same_as_difflib(self):
+        random_generator = random.Random(42)
+
+        def random_name():
+            return ''.join(random_generator.choice('abcde_') for _ in range(random_generator.randint(1, 12)))
+
+        names = [random_name() for _ in range(300)]
+        queries = [random_name() for _ in range(200)] + names[:20]
+        self._assert_same_as_difflib(names, queries)
+
+
+class IterIniFileTestCase(unittest.TestCase):
+
+    def _assert_same_as_config_parser(self, ini_file_content):
+        config = {}
+        for section_name, option_name, value in utils.iter_ini_file(StringIO(ini_file_content)):
+            config.setdefault(section_name, {})[option_name] = value
+
+        self.assertEqual(config, utils.load_config_from_ini_file(ini_file_content))
+
+    def test_basic(self):
+        self._assert_same_as_config_parser("[section1]\noption1 = value1\nOption2: value2\n\n[section2]\noption=%(value)s")
+
+    def test_comments_and_empty_values(self):
+        self._assert_same_as_config_parser("# Comment\n[section]\n; comment\noption1 =\noption2 = value # not a comment\n")
+
+    def test_multiline_values(self):
+        self._assert_same_as_config_parser("[section]\noption1 = first\n  second\n\n  third\n\noption2 = value\n")
+
+    def test_defaults(self):
+        self._assert_same_as_config_parser("[DEFAULT]\noption1 = default\n[section1]\noption2 = value\n[section2]\noption1 = value")
+
+        # Streamed files cannot apply the defaults to the sections already read.
+        self.assertRaises(ValueError, list, utils.iter_ini_file(["[section]\n", "option1=1\n", "[DEFAULT]\n", "option2=2\n"]))
+
+    def test_events_are_grouped_by_section(self):
+        events = list(utils.iter_ini_file(["[section1]\n", "option1=1\n", "[section2]\n", "option2=2\n"]))
+        self.assertEqual(events, [('section1', 'option1', '1'), ('section2', 'option2', '2')])
+
+    def test_missing_section_header(self):
+        self.assertRaises(ValueError, list, utils.iter_ini_file(["option=value\n"]))
+
+
+class ConfigFormatTestCase(unittest.TestCase):
+
+    def test_sniff(self):
+        self.assertEqual(utils.sniff_config_format("# Comment\n\n[section]\noption=value"), 'ini')
+        self.assertEqual(utils.sniff_config_format("; Comment\noption=value"), 'ini')
+        self.assertEqual(utils.sniff_config_format('{"section": {"option": "value"}}'), 'json')
+        self.assertEqual(utils.sniff_config_format("export SECTION__OPTION=value"), 'env')
+        self.assertEqual(utils.sniff_config_format("section:\n  option: value"), 'yaml')
+        self.assertEqual(utils.sniff_config_format('[1, 2]'), 'json')
+        self.assertEqual(utils.sniff_config_format('[\n  {"option": "value"}\n]'), 'json')
+        self.assertEqual(utils.sniff_config_format('name = "value"\n[table]\noption = 1'), 'toml')
+        self.assertEqual(utils.sniff_config_format('[[servers]]\nname = "first"'), 'toml')
+        self.assertEqual(utils.sniff_config_format('[section.table]\noption = 1'), 'toml')
+        self.assertEqual(utils.sniff_config_format(""), 'yaml')
+
+    def test_infer_ini(self):
+        loaded_config = utils.load_config_file('config', "[section]\noption=value")
+        self.assertEqual(loaded_config, {'section': {'option': 'value'}})
+
+    def test_json(self):
+        loaded_config = utils.load_config_file('config.json', '{"section": {"option": 1}}')
+        self.assertEqual(loaded_config, {'section': {'option': 1}})
+
+    def test_env(self):
+        config_file = "# Comment\nSECTION__OPTION='value'\nexport OTHER = 12\n"
+        loaded_config = utils.load_config_file('.env', config_file)
+        self.assertEqual(loaded_config, {'SECTION': {'OPTION': 'value'}, utils.ENV_DEFAULT_SECTION: {'OTHER': '12'}})
+
+    def test_register_config_loader(self):
+        utils.register_config_loader('custom', lambda config_file: {'section': {'option': config_file}}, ['.custom'])
+        try:
+            self.assertEqual(utils.load_config_file('config.CUSTOM', 'value'), {'section': {'option': 'value'}})
+            self.assertIn('.custom', utils.get_config_file_extensions())
+        finally:
+            del utils.CONFIG_LOADERS['custom']
+            del utils.CONFIG_FILE_EXTENSIONS['.custom']
+
+    @unittest.skipIf('toml' not in utils.CONFIG_LOADERS, "No TOML parser available.")
+    def test_toml(self):
+        loaded_config = utils.load_config_file('config.toml', '[section]\noption = 1')
+        self.assertEqual(loaded_config, {'section': {'option': 1}})
@@ -9,7 +9,7 @@ except ImportError:
 import unittest
 
 from confirm import validator
-from confirm.utils import load_config_file
+from confirm.utils import iter_ini_file, load_config_file
 
 import yaml
 
@@ -21,7 +21,7 @@ def _call_validate(config_string, schema_string, **kwargs):
     config_parser = SafeConfigParser()
     config_parser.readfp(StringIO(config_string))
 
-    schema = yaml.load(StringIO(schema_string))
+    schema = yaml.safe_load(StringIO(schema_string))
     config = load_config_file('.ini', config_string)
 
     validation = validator.Validation(config, schema)
@@ -256,3 +256,337 @@ class ValidatorTestCase(unittest.TestCase):
 
         result = _call_validate(config, schema)
         self.assertIn("Option option2 of section section1 is not defined in the schema file.", result.warnings())
+
+
+class ValidateEventsTestCase(unittest.TestCase):
+
+    SCHEMA = """
+    "section1":
+        "option1":
+            "required": true
+            "type": "int"
+        "option2":
+            "deprecated": true
+    "section2":
+        "option3":
+            "required": true
+    "section3":
+        "option4":
+            "description": "Not required."
+    """
+
+    def _validate_both(self, config_string):
+        schema = yaml.safe_load(StringIO(self.SCHEMA))
+
+        validation = validator.Validation(load_config_file('.ini', config_string), schema)
+        validation.validate()
+
+        streaming_validation = validator.Validation(None, schema)
+        streaming_validation.validate_events(iter_ini_file(StringIO(config_string)))
+
+        return validation, streaming_validation
+
+    def test_same_as_validate(self):
+        config = "[section1]\noption1 = one\noption2 = 2\noption5 = 5\n[section23]\noption3 = 3\n[section4]\noption = value"
+
+        validation, streaming_validation = self._validate_both(config)
+
+        self.assertEqual(sorted(validation.errors()), sorted(streaming_validation.errors()))
+        self.assertEqual(sorted(validation.warnings()), sorted(streaming_validation.warnings()))
+        self.assertIn("Missing required section section2 (section23 is a possible typo!).", streaming_validation.errors())
+
+    def test_non_contiguous_section(self):
+        validation = validator.Validation(None, yaml.safe_load(StringIO(self.SCHEMA)))
+        events = [('section1', 'option1', '1'), ('section2', 'option3', '3'), ('section1', 'option2', '2')]
+        self.assertRaises(ValueError, validation.validate_events, events)
+
+
+class IssuesTestCase(unittest.TestCase):
+
+    def test_issues(self):
+        config = "[section]\noption1 = not an int\noption3 = value"
+
+        schema = """
+        "section":
+            "option1":
+                "type": "int"
+            "option2":
+                "required": true
+        """
+
+        result = _call_validate(config, schema)
+        issues = dict((issue.code, issue) for issue in result.issues())
+
+        self.assertEqual(issues['invalid-value'].section, 'section')
+        self.assertEqual(issues['invalid-value'].option, 'option1')
+        self.assertEqual(issues['invalid-value'].expected_type, 'int')
+        self.assertEqual(issues['missing-option'].option, 'option2')
+        self.assertEqual(issues['undefined-option'].severity, 'warning')
+        self.assertEqual(len(result.errors()), 2)
+
+
+class ErrorLimitTestCase(unittest.TestCase):
+
+    CONFIG = "[section1]\noption1 = not an int\noption2 = not an int\n[sectoin2]\noption3 = 3"
+
+    SCHEMA = """
+    "section1":
+        "option1":
+            "type": "int"
+        "option2":
+            "type": "int"
+    "section2":
+        "option3":
+            "required": true
+    """
+
+    def test_complete(self):
+        result = _call_validate(self.CONFIG, self.SCHEMA)
+        self.assertEqual(len(result.errors()), 3)
+        self.assertIn("Missing required section section2 (sectoin2 is a possible typo!).", result.errors())
+        self.assertTrue(result.is_complete())
+
+    def test_fail_fast(self):
+        result = _call_validate(self.CONFIG, self.SCHEMA, fail_fast=True)
+        self.assertEqual(result.errors(), ["Missing required section section2."])
+        self.assertFalse(result.is_valid())
+        self.assertFalse(result.is_complete())
+
+    def test_max_errors(self):
+        result = _call_validate(self.CONFIG, self.SCHEMA, max_errors=2)
+        self.assertEqual(len(result.errors()), 2)
+        self.assertFalse(result.is_complete())
+
+        result = _call_validate(self.CONFIG, self.SCHEMA, max_errors=3)
+        self.assertEqual(len(result.errors()), 3)
+
+    def test_fail_fast_valid(self):
+        result = _call_validate("[section2]\noption3 = 3", self.SCHEMA, fail_fast=True)
+        self.assertTrue(result.is_valid())
+        self.assertTrue(result.is_complete())
+
+
+class TypedConfigTestCase(unittest.TestCase):
+
+    def test_typed_config(self):
+        config = "[section]\nint = 12\nfloat = 1.5\nbool = true\nlist = a, b\nstr = 12\nbad = not an int\nother = value\n[undefined]\noption = 1"
+
+        schema = """
+        "section":
+            "int":
+                "type": "int"
+            "float":
+                "type": "float"
+            "bool":
+                "type": "bool"
+            "list":
+                "type": "list"
+            "str":
+                "type": "str"
+            "bad":
+                "type": "int"
+        """
+
+        result = _call_validate(config, schema, coerce_values=True)
+        self.assertEqual(result.typed_config(), {
+            'section': {
+                'int': 12, 'float': 1.5, 'bool': True, 'list': ['a', 'b'], 'str': '12', 'bad': 'not an int', 'other': 'value',
+            },
+            'undefined': {'option': '1'},
+        })
+        self.assertEqual(result.errors(), ["Invalid value for type int : not an int."])
+
+    def test_not_requested(self):
+        result = _call_validate("[section]\noption = 1", '"section": {"option": {"type": "int"}}')
+        self.assertIsNone(result.typed_config())
+
+    def test_invalid_list(self):
+        validation = validator.Validation({'section': {'option': {'a': 1}}}, {'section': {'option': {'type': 'list'}}})
+        validation.validate()
+        self.assertIn("Invalid value for type list : {'a': 1}.", validation.errors())
+
+
+class ConstraintsTestCase(unittest.TestCase):
+
+    SCHEMA = """
+    "section":
+        "level":
+            "choices": ["debug", "info"]
+        "workers":
+            "type": "int"
+            "min": 1
+            "max": 16
+            "choices": [1, 2, 4, 8, 16]
+        "name":
+            "pattern": "^[a-z]+$"
+            "min_length": 2
+            "max_length": 8
+        "hosts":
+            "type": "list"
+            "pattern": "^[a-z.]+$"
+            "max_length": 2
+    """
+
+    def _codes(self, config):
+        return sorted(issue.code for issue in _call_validate(config, self.SCHEMA).issues())
+
+    def test_valid(self):
+        self.assertEqual(self._codes("[section]\nlevel = info\nworkers = 08\nname = server\nhosts = a.b, c"), [])
+
+    def test_invalid(self):
+        self.assertEqual(self._codes("[section]\nlevel = trace"), ['invalid-choice'])
+        self.assertEqual(self._codes("[section]\nworkers = 32"), ['invalid-choice', 'out-of-range'])
+        self.assertEqual(self._codes("[section]\nworkers = 3"), ['invalid-choice'])
+        self.assertEqual(self._codes("[section]\nname = Server1"), ['pattern-mismatch'])
+        self.assertEqual(self._codes("[section]\nname = a"), ['invalid-length'])
+        self.assertEqual(self._codes("[section]\nhosts = a, b, C"), ['invalid-length', 'pattern-mismatch'])
+
+    def test_falsy_values(self):
+        schema = {'section': {
+            'port': {'type': 'int', 'required': True, 'min': 1, 'choices': [1, 2]},
+            'name': {'min_length': 3},
+            'debug': {'type': 'bool', 'choices': [True]},
+        }}
+
+        def codes(section_config):
+            validation = validator.Validation({'section': section_config}, schema)
+            validation.validate()
+            return sorted(issue.code for issue in validation.issues())
+
+        self.assertEqual(codes({'port': 0}), ['invalid-choice', 'out-of-range'])
+        self.assertEqual(codes({'port': 1, 'name': 'ab'}), ['invalid-length'])
+        self.assertEqual(codes({'port': 1, 'debug': False}), ['invalid-choice'])
+        self.assertEqual(codes({'port': 1, 'debug': 'false'}), ['invalid-choice'])
+
+    def test_empty_values(self):
+        # Empty values are handled as missing values, and are not checked against the constraints.
+        self.assertEqual(self._codes("[section]\nlevel =\nworkers =\nname ="), [])
+
+        schema = {'section': {'level': {'required': True, 'choices': ['debug', 'info']}}}
+        validation = validator.Validation({'section': {'level': ''}}, schema)
+        validation.validate()
+        self.assertEqual([issue.code for issue in validation.issues()], ['missing-option'])
+
+    def test_not_checked_on_invalid_type(self):
+        self.assertEqual(self._codes("[section]\nworkers = many"), ['invalid-value'])
+
+    def test_messages(self):
+        result = _call_validate("[section]\nworkers = 0\nlevel = trace", self.SCHEMA)
+        self.assertEqual(sorted(result.errors()), [
+            "Invalid value for option level of section section : trace is not one of debug, info.",
+            "Invalid value for option workers of section section : 0 is not at least 1.",
+            "Invalid value for option workers of section section : 0 is not one of 1, 2, 4, 8, 16.",
+        ])
+
+    def test_invalid_constraint(self):
+        # Invalid constraints are schema errors, rejected before any configuration is validated.
+        self.assertRaises(ValueError, _call_validate, "[section]\noption = value", '"section": {"option": {"pattern": "(", "type": "str"}}')
+
+        with self.assertRaises(ValueError) as context:
+            _call_validate("[section]\noption = value", '"section": {"option": {"min": 1}}')
+        self.assertEqual(str(context.exception), "Invalid constraint for option option : min and max require the int or float type.")
+
+
+class ParallelSectionsTestCase(unittest.TestCase):
+
+    SCHEMA = {
+        'server': {'port': {'type': 'int', 'required': True}, 'host': {'required': True}},
+        'deprecated': {'option': {'deprecated': True}},
+        'required': {'option': {'required': True}},
+    }
+
+    def _get_config(self):
+        config = {'deprecated': {'option': '1'}, 'requried': {'option': '1'}}
+        for index in range(validator.MIN_PARALLEL_SECTIONS):
+            if index % 3:
+                config['undefined%d' % index] = {'option': str(index)}
+            else:
+                config['server'] = {'port': 'not an int' if index % 2 else str(index), 'hots': 'localhost'}
+                config['server%d' % index] = config['server']
+        return config
+
+    def _validate(self, **kwargs):
+        validation = validator.Validation(self._get_config(), self.SCHEMA)
+        validation.validate(**kwargs)
+        return validation
+
+    def test_same_issues(self):
+        for kwargs in [{}, {'error_on_deprecated': True}, {'max_errors': 2}, {'fail_fast': True}, {'coerce_values': True}]:
+            serial = self._validate(**kwargs)
+            parallel = self._validate(section_jobs=2, **kwargs)
+            self.assertEqual(parallel.issues(), serial.issues())
+            self.assertEqual(parallel.is_complete(), serial.is_complete())
+            self.assertEqual(parallel.typed_config(), serial.typed_config())
+
+    def test_typo_detection(self):
+        errors = self._validate(section_jobs=2).errors()
+        self.assertIn("Missing required section required (requried is a possible typo!).", errors)
+        self.assertIn("Missing required option host in section server (hots is a possible typo!).", errors)
+
+
+class NestedSectionsTestCase(unittest.TestCase):
+
+    SCHEMA = """
+    "server":
+        "name":
+            "required": true
+        "hosts":
+            "type": "list"
+        "http":
+            "port":
+                "type": "int"
+                "required": true
+    "logging.file":
+        "path":
+            "required": true
+    """
+
+    CONFIG = """
+    server:
+        name: api
+        http:
+            prot: 80
+        extra:
+            option: 1
+    logging:
+        file:
+            path: /var/log/api.log
+    """
+
+    def _validate(self, config):
+        validation = validator.Validation(yaml.safe_load(StringIO(config)), yaml.safe_load(StringIO(self.SCHEMA)))
+        validation.validate(coerce_values=True)
+        return validation
+
+    def test_dotted_paths(self):
+        validation = self._validate(self.CONFIG)
+        self.assertEqual(validation.errors(), ["Missing required option port in section server.http (prot is a possible typo!)."])
+        self.assertEqual(validation.warnings(), [
+            "Option prot of section server.http is not defined in the schema file.",
+            "Section server.extra is not defined in the schema file.",
+        ])
+        self.assertEqual(validation.typed_config(), {
+            'server': {'name': 'api'},
+            'server.http': {'prot': 80},
+            'server.extra': {'option': 1},
+            'logging.file': {'path': '/var/log/api.log'},
+        })
+
+    def test_mapping_option(self):
+        validation = self._validate("server:\n  name: api\n  hosts:\n    a: 1\n  http:\n    port: 80\nlogging.file:\n  path: log")
+        self.assertEqual(validation.errors(), ["Invalid value for type list : {'a': 1}."])
+
+    def test_missing_nested_section(self):
+        validation = self._validate("server:\n  name: api\n  htp:\n    port: 80")
+        self.assertIn("Missing required section server.http (server.htp is a possible typo!).", validation.errors())
+        self.assertIn("Missing required section logging.file.", validation.errors())
+
+    def test_deep_document(self):
+        config = leaf = {}
+        for _ in range(5000):
+            leaf['level'] = leaf = {}
+        leaf['option'] = 1
+
+        validation = validator.Validation(config, {})
+        validation.validate()
+        self.assertEqual(validation.warnings(), ["Section %s is not defined in the schema file." % '.'.join(['level'] * 5000)])